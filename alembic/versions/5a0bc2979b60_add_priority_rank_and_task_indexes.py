@@ -0,0 +1,53 @@
+"""add priority rank and task indexes
+
+Revision ID: 5a0bc2979b60
+Revises: c2a2e886dd4f
+Create Date: 2026-10-17 09:12:05.114302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a0bc2979b60'
+down_revision: Union[str, Sequence[str], None] = 'c2a2e886dd4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PRIORITY_RANK_SQL = (
+    "CASE priority WHEN 'high' THEN 1 WHEN 'medium' THEN 2 WHEN 'low' THEN 3 "
+    "ELSE 4 END"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite can only add STORED generated columns by rebuilding the table
+    with op.batch_alter_table('tasks', recreate='always') as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                'priority_rank',
+                sa.Integer(),
+                sa.Computed(PRIORITY_RANK_SQL, persisted=True),
+                nullable=True,
+            )
+        )
+    op.create_index('ix_tasks_priority_rank_id', 'tasks', ['priority_rank', 'id'], unique=False)
+    op.create_index('ix_tasks_user_id_priority_rank_id', 'tasks', ['user_id', 'priority_rank', 'id'], unique=False)
+    op.create_index('ix_tasks_status_priority_rank_id', 'tasks', ['status', 'priority_rank', 'id'], unique=False)
+    op.create_index('ix_tasks_start_date_end_date', 'tasks', ['start_date', 'end_date'], unique=False)
+    op.create_index('ix_tasks_created_by', 'tasks', ['created_by'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_created_by', table_name='tasks')
+    op.drop_index('ix_tasks_start_date_end_date', table_name='tasks')
+    op.drop_index('ix_tasks_status_priority_rank_id', table_name='tasks')
+    op.drop_index('ix_tasks_user_id_priority_rank_id', table_name='tasks')
+    op.drop_index('ix_tasks_priority_rank_id', table_name='tasks')
+    with op.batch_alter_table('tasks', recreate='always') as batch_op:
+        batch_op.drop_column('priority_rank')
@@ -0,0 +1,28 @@
+"""add end date status index
+
+Revision ID: 8d41e7c03f5a
+Revises: 5a0bc2979b60
+Create Date: 2026-10-17 11:02:47.530918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41e7c03f5a'
+down_revision: Union[str, Sequence[str], None] = '5a0bc2979b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_end_date_status', 'tasks', ['end_date', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_end_date_status', table_name='tasks')
@@ -0,0 +1,53 @@
+"""add tasks fts
+
+Revision ID: b7f3c1d9e2a4
+Revises: 8d41e7c03f5a
+Create Date: 2026-10-17 16:40:12.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f3c1d9e2a4'
+down_revision: Union[str, Sequence[str], None] = '8d41e7c03f5a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "title, description, jira_link, pull_requests_links"
+NEW = "new.id, new.title, new.description, new.jira_link, new.pull_requests_links"
+OLD = "old.id, old.title, old.description, old.jira_link, old.pull_requests_links"
+INSERT = f"INSERT INTO tasks_fts(rowid, {COLUMNS}) VALUES ({NEW});"
+REMOVE = f"INSERT INTO tasks_fts(tasks_fts, rowid, {COLUMNS}) VALUES ('delete', {OLD});"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FTS5 is SQLite-only; other databases keep vector-only search
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        f"CREATE VIRTUAL TABLE tasks_fts USING fts5({COLUMNS}, "
+        "content='tasks', content_rowid='id')"
+    )
+    op.execute(f"CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN {INSERT} END")
+    op.execute(f"CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN {REMOVE} END")
+    op.execute(
+        f"CREATE TRIGGER tasks_fts_update AFTER UPDATE OF {COLUMNS} ON tasks "
+        f"BEGIN {REMOVE} {INSERT} END"
+    )
+    # Index the existing rows
+    op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TRIGGER IF EXISTS tasks_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS tasks_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS tasks_fts_insert")
+    op.execute("DROP TABLE IF EXISTS tasks_fts")
@@ -1,11 +1,15 @@
+import hashlib
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app.models import User
-from app.database import SessionLocal
+from app.database import AsyncSessionLocal, ReadSessionLocal, SessionLocal, run_db
 from app.config import settings
+from app.lru import LRUCache
+from app.passwords import password_hasher
 from sqlalchemy.orm import Session
 
 ALGORITHM = "HS256"
@@ -13,24 +17,45 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 SECRET_KEY = settings.secret_key
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
 
 
-def get_db():
-    db = SessionLocal()
+def get_read_db():
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
         db.close()
 
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+@asynccontextmanager
+async def open_session(read_only: bool = False):
+    if settings.db_async:
+        async with AsyncSessionLocal(read_only) as db:
+            yield db
+        return
+    db = ReadSessionLocal() if read_only else SessionLocal()
+    try:
+        yield db
+    finally:
+        # Closed inline: waiting for a threadpool slot just to hand the
+        # connection back can deadlock with threads waiting for a connection
+        db.close()
 
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def get_session():
+    """Session for the current database mode: ``AsyncSession`` when DB_ASYNC is set.
+
+    Routes pass it to ``run_db`` so the same crud functions serve both modes.
+    """
+    async with open_session() as db:
+        yield db
+
+
+async def get_read_session():
+    """Like ``get_session`` but from the read-only pool, for GET routes"""
+    async with open_session(read_only=True) as db:
+        yield db
 
 
 def create_access_token(data: dict, expires_delta=None):
@@ -42,31 +67,98 @@ def create_access_token(data: dict, expires_delta=None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def decode_access_token(token: str):
+    """Verified token claims, or None if the token is invalid or expired"""
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+
 def get_user(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
 
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user(db, username)
-    if not user or not verify_password(password, user.hashed_password):
+async def authenticate_user(db, username: str, password: str):
+    user = await run_db(db, get_user, username)
+    if not user:
         return None
+    verified, new_hash = await password_hasher.verify_and_update(
+        password, user.hashed_password
+    )
+    if not verified:
+        return None
+    if new_hash:
+        # Stored hash used an outdated bcrypt cost; upgrade it transparently
+        user.hashed_password = new_hash
+        await run_db(db, Session.commit)
+        password_hasher.record_rehash()
+        principal_cache.invalidate_user(username)
     return user
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+class PrincipalCache:
+    """Short-lived cache of authenticated users keyed on a hash of the token.
+
+    An entry lives until the token's ``exp`` or ``ttl`` seconds, whichever
+    comes first, and can be dropped early when the user changes.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = settings.principal_cache_size,
+        ttl: float = settings.principal_cache_ttl,
+    ):
+        # Wall clock, so expiry can be compared with the token's exp claim
+        self._entries = LRUCache(maxsize, ttl, clock=time.time)
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        entry = self._entries.get(self._key(token))
+        return entry[1] if entry is not None else None
+
+    def set(self, token: str, claims: dict, user: User):
+        exp = claims.get("exp")
+        self._entries.set(
+            self._key(token),
+            (claims, user),
+            expires_at=float(exp) if exp is not None else None,
+        )
+
+    def invalidate_user(self, username: str):
+        self.invalidations += self._entries.discard_where(
+            lambda entry: entry[0].get("sub") == username
+        )
+
+    def stats(self) -> dict:
+        return {**self._entries.stats(), "invalidations": self.invalidations}
+
+
+principal_cache = PrincipalCache()
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db=Depends(get_read_session)
 ):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-    except JWTError:
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+    payload = decode_access_token(token)
+    if payload is None:
         raise credentials_exception
-    user = get_user(db, username)
+    user = await run_db(db, get_user, payload.get("sub"))
     if user is None:
         raise credentials_exception
+    # Detach so commits in this request can't expire the cached instance
+    db.expunge(user)
+    principal_cache.set(token, payload, user)
     return user
@@ -0,0 +1,309 @@
+"""Compare database and search configurations under concurrent load.
+
+Usage: python -m app.benchmark [db-mode|sqlite|search] [--requests 5000] [...]
+
+``db-mode`` compares the sync and async database modes by driving the app
+in-process through httpx. ``sqlite`` compares the tuned SQLite profile (WAL,
+read pool, ...) with SQLite's defaults by running reads and writes from
+``--processes`` separate processes, which is where lock waits show up.
+``search`` compares batched and one-at-a-time search query encoding at 1, 8
+and 32 concurrent searchers, with the real model or ``--stub-encoder``.
+Each variant runs in its own subprocess against a throwaway SQLite database
+and vector store.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+COMPARISONS = {
+    "db-mode": {
+        "sync": {"DB_ASYNC": "false"},
+        "async": {"DB_ASYNC": "true"},
+    },
+    "sqlite": {
+        "defaults": {
+            "SQLITE_JOURNAL_MODE": "delete",
+            "SQLITE_SYNCHRONOUS": "full",
+            "SQLITE_CACHE_SIZE": "-2000",
+            "SQLITE_MMAP_SIZE": "0",
+            "DB_READ_POOL_SIZE": "0",
+        },
+        "tuned": {},
+    },
+    "search": {
+        "unbatched": {"SEARCH_BATCH_MAX_SIZE": "1"},
+        "batched": {},
+    },
+}
+
+SEARCHERS = (1, 8, 32)
+
+
+def task_payload(i: int) -> dict:
+    return {
+        "title": f"task {i}",
+        "description": f"benchmark task {i}",
+        "status": "pending",
+        "user_id": 1,
+        "start_date": "2025-01-01T00:00:00",
+        "end_date": "2030-01-01T00:00:00",
+        "jira_link": "",
+        "created_by": 1,
+        "pull_requests_links": "",
+        "priority": random.choice(["high", "medium", "low"]),
+    }
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[max(int(len(values) * fraction) - 1, 0)] * 1000, 2)
+
+
+def summarize(reads, writes, errors, elapsed, **extra) -> dict:
+    total = len(reads) + len(writes)
+    return {
+        "requests": total,
+        "errors": errors,
+        **extra,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(reads + writes) * 1000, 2),
+        "read_p99_ms": percentile(reads, 0.99),
+        "write_p99_ms": percentile(writes, 0.99),
+    }
+
+
+async def run_http(
+    concurrency: int, total: int, task_count: int, write_ratio: float
+) -> dict:
+    import httpx
+
+    from app.database import Base, engine
+    from app.main import app
+
+    Base.metadata.create_all(bind=engine)
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport doesn't send lifespan events; run them so the indexer
+    # and other background workers behave as they do when served
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        credentials = {"username": "bench", "password": "bench"}
+        await client.post("/users/register", json=credentials)
+        login = await client.post("/users/login", data=credentials)
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        tasks = [task_payload(i) for i in range(task_count)]
+        await client.post("/tasks/bulk", json=tasks, headers=headers)
+
+        reads, writes = [], []
+        errors = 0
+        remaining = iter(range(total))
+
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                task_id = random.randint(1, task_count)
+                write = random.random() < write_ratio
+                started = time.perf_counter()
+                if write:
+                    response = await client.patch(
+                        f"/tasks/{task_id}/status",
+                        params={"status": random.choice(["pending", "completed"])},
+                        headers=headers,
+                    )
+                else:
+                    response = await client.get(f"/tasks/{task_id}", headers=headers)
+                (writes if write else reads).append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(reads, writes, errors, elapsed)
+
+
+def stress_worker(operations: int, task_count: int, write_ratio: float):
+    """One process's share of the SQLite stress run: list pages and status updates"""
+    from sqlalchemy.exc import OperationalError
+
+    from app.crud import get_tasks, update_tasks_bulk
+    from app.database import ReadSessionLocal, SessionLocal
+
+    reads, writes = [], []
+    locked = 0
+    began = time.perf_counter()
+    for _ in range(operations):
+        write = random.random() < write_ratio
+        started = time.perf_counter()
+        try:
+            if write:
+                with SessionLocal() as db:
+                    update_tasks_bulk(
+                        db,
+                        ids=[random.randint(1, task_count)],
+                        status=random.choice(["pending", "completed"]),
+                    )
+            else:
+                with ReadSessionLocal() as db:
+                    get_tasks(db, skip=random.randint(0, task_count - 50), limit=50)
+        except OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+        (writes if write else reads).append(time.perf_counter() - started)
+    return reads, writes, locked, time.perf_counter() - began
+
+
+def run_sqlite(processes: int, total: int, task_count: int, write_ratio: float):
+    from app.crud import create_tasks_bulk, create_user
+    from app.database import Base, SessionLocal, engine
+    from app.schemas import TaskCreate
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        create_user(db, "bench", "")
+        tasks = [TaskCreate(**task_payload(i)) for i in range(task_count)]
+        create_tasks_bulk(db, tasks)
+    engine.dispose()
+
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        results = pool.starmap(
+            stress_worker,
+            [(total // processes, task_count, write_ratio)] * processes,
+        )
+    # Slowest worker's own wall time, excluding process startup and imports
+    elapsed = max(result[3] for result in results)
+
+    reads = [latency for result in results for latency in result[0]]
+    writes = [latency for result in results for latency in result[1]]
+    locked = sum(result[2] for result in results)
+    return summarize(reads, writes, locked, elapsed, processes=processes)
+
+
+class StubEncoder:
+    """Stands in for the SentenceTransformer model without loading it.
+
+    Each call costs a fixed overhead plus a little per text, the shape of a
+    forward pass that batching amortizes.
+    """
+
+    dimensions = 384
+
+    def __init__(self, call_seconds: float = 0.01, text_seconds: float = 0.0005):
+        self.call_seconds = call_seconds
+        self.text_seconds = text_seconds
+
+    def encode(self, texts, **kwargs):
+        time.sleep(self.call_seconds + self.text_seconds * len(texts))
+        return [[0.0] * self.dimensions for _ in texts]
+
+
+def run_search(total: int, stub_encoder: bool) -> dict:
+    """Encode ``total`` distinct queries at each searcher count in SEARCHERS"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from app import embeddings
+
+    if stub_encoder:
+        embeddings._model = StubEncoder()
+    else:
+        embeddings.get_model()  # Load the model before timing anything
+
+    queries = itertools.count()
+    results = {}
+    for searchers in SEARCHERS:
+        # A fresh embedder per run, so its batch stats cover only this run
+        embedder = embeddings.QueryEmbedder()
+        latencies = []
+
+        def search(_):
+            started = time.perf_counter()
+            embedder.embed(f"benchmark query {next(queries)}")
+            latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        # Search requests run in the threadpool, so threads model them closely
+        with ThreadPoolExecutor(searchers) as pool:
+            list(pool.map(search, range(total)))
+        elapsed = time.perf_counter() - started
+        results[f"searchers_{searchers}"] = {
+            "searches_per_second": round(total / elapsed, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 2),
+            "p99_ms": percentile(latencies, 0.99),
+            "avg_batch_size": embedder.stats()["avg_batch_size"],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("compare", nargs="?", choices=COMPARISONS, default="db-mode")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument(
+        "--stub-encoder",
+        action="store_true",
+        help="Search with a fake encoder instead of loading the model",
+    )
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        if args.compare == "sqlite":
+            result = run_sqlite(
+                args.processes, args.requests, args.tasks, args.write_ratio
+            )
+        elif args.compare == "search":
+            result = run_search(args.requests, args.stub_encoder)
+        else:
+            result = asyncio.run(
+                run_http(args.concurrency, args.requests, args.tasks, args.write_ratio)
+            )
+        print(json.dumps(result))
+        return
+
+    for variant, overrides in COMPARISONS[args.compare].items():
+        with tempfile.TemporaryDirectory() as workdir:
+            env = dict(
+                os.environ,
+                DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+                # The indexer runs during db-mode, keep its vectors out of ./chroma
+                CHROMA_PATH=os.path.join(workdir, "chroma"),
+                ASYNC_DATABASE_URL="",
+                BCRYPT_ROUNDS="4",
+                **overrides,
+            )
+            output = subprocess.run(
+                [sys.executable, "-m", "app.benchmark", args.compare, "--worker"]
+                + ["--concurrency", str(args.concurrency)]
+                + ["--processes", str(args.processes)]
+                + ["--requests", str(args.requests), "--tasks", str(args.tasks)]
+                + ["--write-ratio", str(args.write_ratio)]
+                + (["--stub-encoder"] if args.stub_encoder else []),
+                env=env,
+                cwd=os.getcwd(),
+                check=True,
+                stdout=subprocess.PIPE,
+                text=True,
+            ).stdout
+            print(variant, output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
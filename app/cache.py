@@ -0,0 +1,145 @@
+import threading
+import time
+import uuid
+from datetime import date
+from typing import Awaitable, Callable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.config import settings
+from app.lru import LRUCache
+
+
+class CacheBackend:
+    """Storage for per-collection write generations and cached responses.
+
+    Every write to a collection bumps its generation, so a generation number
+    identifies one version of the data and cached entries are keyed on it.
+    A shared store (e.g. Redis) can implement this interface so several
+    workers agree on the generation and share cached responses.
+    """
+
+    # Distinguishes generations of independent backends (e.g. separate processes)
+    epoch: str = ""
+
+    def generation(self, namespace: str) -> int:
+        raise NotImplementedError
+
+    def window(self) -> str:
+        """Extra ETag component for backends that can miss other workers' writes"""
+        return ""
+
+    def bump(self, namespace: str) -> int:
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: dict):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryBackend(CacheBackend):
+    """Process-local LRU backend; each process gets its own random epoch.
+
+    Generations live in this process, so it is only exact with a single
+    worker: writes handled by another worker don't invalidate it. Entries and
+    ETags are therefore reused for at most ``ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = settings.result_cache_size,
+        ttl: float = settings.result_cache_ttl,
+    ):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.ttl = ttl
+        self._generations: dict = {}
+        self._entries = LRUCache(maxsize, ttl)
+        self._lock = threading.Lock()
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def bump(self, namespace: str) -> int:
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            return self._generations[namespace]
+
+    def window(self) -> str:
+        # ETags roll over every ttl seconds, so a stale one stops matching
+        return str(int(time.time() // self.ttl))
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: dict):
+        self._entries.set(key, value)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {**self._entries.stats(), "generations": dict(self._generations)}
+
+
+backend: CacheBackend = InMemoryBackend()
+
+
+def bump_generation(namespace: str = "tasks") -> int:
+    return backend.bump(namespace)
+
+
+def current_etag(namespace: str = "tasks") -> str:
+    """Weak validator for the current version of ``namespace``.
+
+    Includes today's date because derived fields (e.g. overdue status) change
+    with the calendar even when no write happens.
+    """
+    generation = backend.generation(namespace)
+    version = f"{backend.epoch}-{generation}-{backend.window()}"
+    return f'W/"{namespace}-{version}-{date.today().isoformat()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: ignore the W/ prefix on both sides
+    bare = etag.removeprefix("W/")
+    return "*" in candidates or any(
+        tag.removeprefix("W/") == bare for tag in candidates
+    )
+
+
+async def cached_response(
+    request: Request,
+    build: Callable[[], Awaitable[Tuple[bytes, dict]]],
+    namespace: str = "tasks",
+) -> Response:
+    """Serve an already-serialized JSON response for this URL from the cache.
+
+    ``build`` runs only on a miss and returns the JSON body and extra headers.
+    Entries are keyed on the namespace generation, so any write makes every
+    earlier entry unreachable; those age out through LRU eviction.
+    """
+    generation = backend.generation(namespace)
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    key = (
+        f"{namespace}:{backend.epoch}:{generation}:{date.today().isoformat()}:"
+        f"{request.url.path}?{query}"
+    )
+    entry = backend.get(key)
+    if entry is None:
+        body, headers = await build()
+        entry = {"body": body, "headers": headers}
+        backend.set(key, entry)
+    return Response(
+        content=entry["body"], media_type="application/json", headers=entry["headers"]
+    )
@@ -5,11 +5,85 @@ class Settings(BaseSettings):
     app_name: str = "FastAPI CRUD"
     secret_key: str = "CHANGE_THIS"  # Default fallback value
     database_url: str = "sqlite:///./test.db"
+    # Serve routes with AsyncSession instead of sync sessions in the threadpool
+    db_async: bool = False
+    async_database_url: str = ""  # Defaults to database_url with the aiosqlite driver
+
+    # Connection pool and SQLite tuning
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30  # Seconds to wait for a pooled connection
+    db_read_pool_size: int = 10  # Read-only pool for GET routes, 0 shares the main pool
+    db_read_max_overflow: int = 20
+    sqlite_journal_mode: str = "wal"  # Readers and writer run concurrently
+    sqlite_synchronous: str = "normal"  # Safe with WAL, fewer fsyncs than "full"
+    sqlite_busy_timeout: int = 5000  # Milliseconds to wait on a lock before failing
+    sqlite_cache_size: int = -64000  # Negative values are KiB, so ~64 MB per connection
+    sqlite_mmap_size: int = 268435456  # Bytes of the database file memory-mapped
 
     # Ollama settings
     ollama_host: str = "http://localhost:11434"
     ollama_model: str = "llama3.2"
     ollama_timeout: int = 30
+    ollama_max_connections: int = 20  # Concurrent HTTP connections to Ollama
+    ollama_max_keepalive: int = 10  # Idle connections kept open for reuse
+    ollama_keepalive_expiry: float = 30  # Seconds an idle connection is kept
+    llm_heartbeat_interval: float = 15  # Seconds between SSE keep-alive comments
+    ollama_models_cache_ttl: float = 60  # Seconds the model list is reused
+    # How long a model stays loaded after use, -1 keeps it loaded forever
+    ollama_keep_alive: str = "30m"
+    ollama_model_keep_alive: dict = {}  # Per-model overrides, e.g. {"llama3.2": "-1"}
+    ollama_preload_models: str = ""  # Comma-separated models loaded at startup
+
+    # LLM scheduler, bounds generations running against Ollama at once
+    llm_max_concurrency: int = 2  # Generations running at the same time
+    llm_queue_size: int = 32  # Requests waiting for a slot before 503s
+    llm_queue_per_user: int = 4  # Requests one user may have waiting before 429s
+    llm_queue_deadline: float = 30  # Max seconds a request may wait for a slot
+
+    # LLM completion cache, only used for temperature=0 requests
+    llm_cache_enabled: bool = False
+    llm_cache_size: int = 256  # Responses kept in memory
+    llm_cache_ttl: float = 86400  # Seconds a cached response is reused
+    llm_cache_path: str = ""  # SQLite file for the on-disk tier, "" disables it
+    llm_cache_disk_size: int = 10000  # Responses kept on disk
+
+    # Vector search settings
+    embedding_model: str = "all-MiniLM-L6-v2"
+    chroma_path: str = "./chroma"  # Directory of the persistent vector store
+    index_batch_size: int = 64  # Max tasks encoded per indexing batch
+    index_flush_interval: float = 0.5  # Seconds to wait for a batch to fill
+    index_queue_size: int = 10000  # 0 means unbounded, full drops new jobs
+    index_max_attempts: int = 3  # Tries per job before it counts as failed
+    search_batch_window_ms: float = 5.0  # Window for coalescing search queries
+    search_batch_max_size: int = 32  # Max search queries encoded together
+    query_cache_size: int = 1024  # Cached query embeddings, 0 disables
+    query_cache_ttl: float = 3600  # Seconds a cached query embedding is reused
+    search_max_distance: float = 1.5  # Vector hits further away than this are dropped
+    search_rrf_k: int = 60  # Reciprocal-rank fusion constant, higher flattens ranks
+    # Load the embedding model and Chroma in the background at startup
+    warmup_on_startup: bool = False
+
+    # Auth settings
+    bcrypt_rounds: int = 12  # Changing this rehashes passwords on next login
+    password_hash_executor: str = "thread"  # "thread" or "process"
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 64  # Queued + running before 503s
+    principal_cache_size: int = 1024  # Cached authenticated tokens, 0 disables
+    principal_cache_ttl: float = 60  # Max seconds a token's user is reused
+
+    # Bulk task settings
+    bulk_max_tasks: int = 5000  # Max tasks accepted by one bulk request
+    bulk_insert_chunk_size: int = 500  # Rows per INSERT statement
+
+    # Export settings
+    export_batch_size: int = 1000  # Rows fetched and sent per streamed chunk
+
+    # Response cache settings
+    result_cache_size: int = 512  # Cached task list responses, 0 disables
+    # Max seconds a cached list or ETag is reused; bounds staleness when another
+    # worker's writes can't invalidate this one's cache
+    result_cache_ttl: float = 30
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,14 +1,40 @@
-from typing import List
+import base64
+import binascii
+import hashlib
+import json
+from typing import List, Optional
 from app.models import Item, Task, User
-from sqlalchemy.orm import Session
-from datetime import datetime
+from sqlalchemy.orm import Query, Session
+from datetime import date, datetime, time
 from fastapi import HTTPException
-from sqlalchemy import case
-from sentence_transformers import SentenceTransformer
-from app.database import collection
-from app.schemas import TaskOut
-
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from pydantic import ValidationError
+from sqlalchemy import (
+    and_,
+    case,
+    delete,
+    func,
+    insert,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
+from app.config import settings
+from app.cache import bump_generation
+from app.database import begin_write, get_collection
+from app.embeddings import embed_query
+from app.indexing import indexer
+from app.schemas import TaskBulkFilter, TaskCreate, TaskOut, TaskStatus
+
+
+def create_user(db: Session, username: str, hashed_password: str):
+    db_user = User(username=username, hashed_password=hashed_password)
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
 
 
 def create_item(db: Session, title: str, description: str):
@@ -41,6 +67,48 @@ def delete_item(db: Session, item_id: int):
     return db_item
 
 
+def task_index_text(title: Optional[str], description: Optional[str]) -> str:
+    """Text embedded for a task, the same wherever the task is (re)indexed"""
+    return f"{title or ''} {description or ''}".strip()
+
+
+def task_index_metadata(task, text: str) -> dict:
+    # Chroma metadata values can't be None
+    status = getattr(task.status, "value", task.status)
+    return {
+        "task_id": task.id,
+        "title": task.title or "",
+        "status": status or "",
+        "priority": task.priority or "",
+        "content_hash": hashlib.sha256(text.encode()).hexdigest(),
+    }
+
+
+def sync_task_index(task):
+    """Queue an upsert of the task's vector; unchanged text skips the model"""
+    text = task_index_text(task.title, task.description)
+    indexer.enqueue(task.id, text, task_index_metadata(task, text))
+
+
+def remove_task_index(task_id: int):
+    indexer.remove(task_id)
+
+
+def raise_missing_user(db: Session, *user_ids: int):
+    """Turn a foreign key violation into the 400 naming the missing user"""
+    candidates = [user_id for user_id in user_ids if user_id]
+    existing = set(db.scalars(select(User.id).where(User.id.in_(candidates))))
+    missing = next((user_id for user_id in candidates if user_id not in existing), None)
+    raise HTTPException(
+        status_code=400,
+        detail=(
+            f"User with id {missing} does not exist"
+            if missing is not None
+            else "Task references a user that does not exist"
+        ),
+    )
+
+
 def create_task(
     db: Session,
     title: str,
@@ -54,90 +122,341 @@ def create_task(
     pull_requests_links: str,
     priority: str,
 ):
-    # Validate that user_id exists
-    if user_id and not db.query(User).filter(User.id == user_id).first():
-        raise HTTPException(
-            status_code=400, detail=f"User with id {user_id} does not exist"
-        )
+    # Foreign keys are enforced by SQLite, so the INSERT itself validates users
+    try:
+        db_task = db.scalars(
+            insert(Task)
+            .values(
+                title=title,
+                description=description,
+                status=status,
+                user_id=user_id,
+                start_date=start_date,
+                end_date=end_date,
+                jira_link=jira_link,
+                created_by=created_by,
+                pull_requests_links=pull_requests_links,
+                priority=priority,
+            )
+            .returning(Task)
+        ).one()
+        # Detach so the commit doesn't expire it and force a reload
+        db.expunge(db_task)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise_missing_user(db, user_id, created_by)
+    bump_generation("tasks")
 
-    # Validate that created_by exists
-    if created_by and not db.query(User).filter(User.id == created_by).first():
-        raise HTTPException(
-            status_code=400, detail=f"User with id {created_by} does not exist"
-        )
+    # Embedding is generated and stored by the background indexer
+    sync_task_index(db_task)
+
+    return db_task
 
-    db_task = Task(
-        title=title,
-        description=description,
-        status=status,
-        user_id=user_id,
-        start_date=start_date,
-        end_date=end_date,
-        jira_link=jira_link,
-        created_by=created_by,
-        pull_requests_links=pull_requests_links,
-        priority=priority,
+
+def _insert_tasks(db: Session, rows: List[dict]) -> List[Task]:
+    # One multi-row INSERT ... RETURNING, with rows returned in input order
+    return list(
+        db.scalars(insert(Task).returning(Task, sort_by_parameter_order=True), rows)
     )
-    db.add(db_task)
+
+
+def create_tasks_bulk(db: Session, tasks: List[TaskCreate]) -> List[dict]:
+    """Create many tasks in one transaction, reporting a result per input item.
+
+    Items are checked against ``TaskOut`` and referenced users with a single
+    query, then rows are inserted in chunks. Items that fail are reported with
+    an error instead of aborting the rest of the batch.
+    """
+    results = [
+        {"index": index, "task": None, "error": None} for index in range(len(tasks))
+    ]
+
+    referenced = {
+        user_id
+        for task in tasks
+        for user_id in (task.user_id, task.created_by)
+        if user_id
+    }
+    existing = set(db.scalars(select(User.id).where(User.id.in_(referenced))))
+
+    pending = []
+    for index, task in enumerate(tasks):
+        missing = [
+            user_id
+            for user_id in (task.user_id, task.created_by)
+            if user_id and user_id not in existing
+        ]
+        if missing:
+            results[index]["error"] = f"User with id {missing[0]} does not exist"
+            continue
+        row = task.model_dump()
+        try:
+            # Rows that can't be returned as TaskOut (e.g. an unknown status)
+            TaskOut.model_validate({"id": 0, **row})
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            results[index]["error"] = f"{location}: {error['msg']}"
+            continue
+        pending.append((index, row))
+
+    created = []
+    if pending:
+        # One transaction for every chunk; each chunk is a savepoint inside it
+        begin_write(db)
+    chunk_size = settings.bulk_insert_chunk_size
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start : start + chunk_size]
+        try:
+            with db.begin_nested():
+                inserted = _insert_tasks(db, [row for _, row in chunk])
+            created.extend(zip((index for index, _ in chunk), inserted))
+        except IntegrityError:
+            # Retry the chunk row by row so one bad item doesn't sink the others
+            for index, row in chunk:
+                try:
+                    with db.begin_nested():
+                        created.append((index, _insert_tasks(db, [row])[0]))
+                except IntegrityError as e:
+                    results[index]["error"] = str(e.orig)
+
+    # Snapshot before commit expires the instances (avoids a reload per row)
+    for index, db_task in created:
+        results[index]["task"] = TaskOut.model_validate(db_task)
     db.commit()
-    db.refresh(db_task)
 
-    # Generate and store the embedding for the task description
-    embeddings = model.encode(description)
+    if created:
+        bump_generation("tasks")
+    for index, _ in created:
+        sync_task_index(results[index]["task"])
+    return results
+
 
-    collection.add(
-        ids=[str(db_task.id)],
-        embeddings=embeddings,
-        metadatas=[{"task_id": db_task.id, "title": title, "description": description}],
+def update_tasks_bulk(
+    db: Session,
+    ids: Optional[List[int]] = None,
+    filter: Optional[TaskBulkFilter] = None,
+    status: str = None,
+    user_id: int = None,
+    priority: str = None,
+) -> int:
+    """Apply status/assignee/priority changes to many tasks with one UPDATE.
+
+    Only metadata fields can change here, so the vector index gets
+    metadata-only updates and the embedding model isn't used.
+    Returns the number of tasks updated.
+    """
+    conditions = []
+    if ids is not None:
+        conditions.append(Task.id.in_(ids))
+    if filter is not None:
+        if filter.status is not None:
+            conditions.append(status_condition(filter.status))
+        if filter.user_id is not None:
+            conditions.append(Task.user_id == filter.user_id)
+        if filter.start_date is not None:
+            conditions.append(Task.start_date >= filter.start_date)
+        if filter.end_date is not None:
+            conditions.append(Task.end_date <= filter.end_date)
+    if not conditions:
+        raise HTTPException(
+            status_code=400, detail="Select tasks with ids or at least one filter"
+        )
+
+    values = {}
+    if status is not None:
+        values["status"] = status
+    if user_id is not None:
+        values["user_id"] = user_id
+    if priority is not None:
+        values["priority"] = priority
+    if not values:
+        raise HTTPException(status_code=400, detail="No fields to update")
+
+    try:
+        rows = db.execute(
+            update(Task)
+            .where(*conditions)
+            .values(**values)
+            .returning(
+                Task.id, Task.title, Task.description, Task.status, Task.priority
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise_missing_user(db, user_id)
+
+    if rows:
+        bump_generation("tasks")
+    # user_id isn't stored in the index
+    if "status" in values or "priority" in values:
+        for row in rows:
+            sync_task_index(row)
+    return len(rows)
+
+
+def overdue_cutoff() -> datetime:
+    """Tasks that ended before today's midnight and aren't completed are overdue"""
+    return datetime.combine(date.today(), time.min)
+
+
+def is_overdue():
+    return and_(
+        Task.end_date < overdue_cutoff(),
+        Task.status != TaskStatus.COMPLETED.value,
     )
 
-    return db_task
 
+def effective_status():
+    """Stored status, reported as overdue once the task is past its end date"""
+    return case(
+        (is_overdue(), TaskStatus.OVERDUE.value), else_=Task.status
+    ).label("status")
+
+
+def status_condition(status: str):
+    """Filter on the effective status, so ``overdue`` works like a stored value"""
+    if status == TaskStatus.OVERDUE.value:
+        return is_overdue()
+    if status == TaskStatus.COMPLETED.value:
+        return Task.status == status
+    return and_(
+        Task.status == status,
+        or_(Task.end_date >= overdue_cutoff(), Task.end_date.is_(None)),
+    )
 
-def get_tasks(db: Session, skip: int = 0, limit: int = 100) -> List[TaskOut]:
+
+def task_columns():
+    """Projection shared by the list endpoints, with the effective status"""
     return (
-        db.query(
-            Task.id,
-            Task.title,
-            Task.description,
-            Task.status,
-            Task.user_id,
-            Task.start_date,
-            Task.end_date,
-            Task.jira_link,
-            Task.created_by,
-            Task.pull_requests_links,
-            Task.priority,
-            User.username,
+        Task.id,
+        Task.title,
+        Task.description,
+        effective_status(),
+        Task.user_id,
+        Task.start_date,
+        Task.end_date,
+        Task.jira_link,
+        Task.created_by,
+        Task.pull_requests_links,
+        Task.priority,
+        Task.priority_rank,
+    )
+
+
+def encode_cursor(task) -> str:
+    """Opaque keyset cursor pointing just past ``task`` in (priority rank, id) order"""
+    raw = json.dumps([task.priority_rank, task.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(rank), int(task_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def next_cursor(tasks: list, limit: int) -> Optional[str]:
+    """Cursor for the page after ``tasks``, or None when this was the last page"""
+    if len(tasks) < limit:
+        return None
+    return encode_cursor(tasks[-1])
+
+
+def paginate(query: Query, skip: int, limit: int, cursor: Optional[str] = None):
+    """Order by (priority rank, id) and page with a keyset cursor when given.
+
+    Without a cursor the legacy ``skip`` offset is applied instead.
+    """
+    query = query.order_by(Task.priority_rank, Task.id)
+    if cursor:
+        rank, task_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(Task.priority_rank, Task.id) > tuple_(rank, task_id)
         )
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+
+def get_tasks(
+    db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> List[TaskOut]:
+    query = db.query(*task_columns(), User.username).join(User, Task.user_id == User.id)
+    return paginate(query, skip, limit, cursor)
+
+
+def export_tasks(
+    db: Session,
+    status: Optional[str] = None,
+    user_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
+    """Yield batches of task rows for export, fetched incrementally by id.
+
+    Rows are pulled ``export_batch_size`` at a time from an open cursor, so
+    memory stays flat however many tasks match.
+    """
+    query = (
+        select(*task_columns(), User.username)
         .join(User, Task.user_id == User.id)
-        .order_by(
-            # Custom ordering for priority: high -> medium -> low
-            case(
-                (Task.priority == "high", 1),
-                (Task.priority == "medium", 2),
-                (Task.priority == "low", 3),
-                else_=4,
-            )
+        .order_by(Task.id)
+    )
+    if status is not None:
+        query = query.where(status_condition(status))
+    if user_id is not None:
+        query = query.where(Task.user_id == user_id)
+    if start_date is not None:
+        query = query.where(Task.start_date >= start_date)
+    if end_date is not None:
+        query = query.where(Task.end_date <= end_date)
+
+    result = db.execute(
+        query.execution_options(
+            stream_results=True, yield_per=settings.export_batch_size
         )
-        .offset(skip)
-        .limit(limit)
-        .all()
     )
+    yield from result.partitions()
 
 
 def get_task(db: Session, task_id: int):
-    return db.query(Task).filter(Task.id == task_id).first()
+    # Same projection as the list queries, so an overdue task reads as overdue
+    return db.query(*task_columns()).filter(Task.id == task_id).first()
 
 
-def get_tasks_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return (
-        db.query(Task).filter(Task.user_id == user_id).offset(skip).limit(limit).all()
-    )
+def get_tasks_by_user(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    query = db.query(*task_columns()).filter(Task.user_id == user_id)
+    return paginate(query, skip, limit, cursor)
 
 
-def get_tasks_by_status(db: Session, status: str, skip: int = 0, limit: int = 100):
-    return db.query(Task).filter(Task.status == status).offset(skip).limit(limit).all()
+def get_tasks_by_status(
+    db: Session,
+    status: str,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    query = db.query(*task_columns()).filter(status_condition(status))
+    return paginate(query, skip, limit, cursor)
+
+
+def count_tasks_by_status(db: Session, status: str) -> int:
+    return db.scalar(
+        select(func.count()).select_from(Task).where(status_condition(status))
+    )
 
 
 def get_tasks_by_date(
@@ -146,14 +465,12 @@ def get_tasks_by_date(
     end_date: datetime,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ):
-    return (
-        db.query(Task)
-        .filter(Task.start_date >= start_date, Task.end_date <= end_date)
-        .offset(skip)
-        .limit(limit)
-        .all()
+    query = db.query(*task_columns()).filter(
+        Task.start_date >= start_date, Task.end_date <= end_date
     )
+    return paginate(query, skip, limit, cursor)
 
 
 def update_task(
@@ -169,71 +486,126 @@ def update_task(
     pull_requests_links: str = None,
     priority: str = None,
 ):
-    db_task = db.query(Task).filter(Task.id == task_id).first()
-    if db_task:
-        if title is not None:
-            db_task.title = title
-        if description is not None:
-            db_task.description = description
-        if status is not None:
-            db_task.status = status
-        if user_id is not None:
-            db_task.user_id = user_id
-        if start_date is not None:
-            db_task.start_date = start_date
-        if end_date is not None:
-            db_task.end_date = end_date
-        if jira_link is not None:
-            db_task.jira_link = jira_link
-        if pull_requests_links is not None:
-            db_task.pull_requests_links = pull_requests_links
-        if priority is not None:
-            db_task.priority = priority
+    values = {
+        name: value
+        for name, value in (
+            ("title", title),
+            ("description", description),
+            ("status", status),
+            ("user_id", user_id),
+            ("start_date", start_date),
+            ("end_date", end_date),
+            ("jira_link", jira_link),
+            ("pull_requests_links", pull_requests_links),
+            ("priority", priority),
+        )
+        if value is not None
+    }
+    if not values:
+        return get_task(db, task_id)
+
+    # Single UPDATE ... RETURNING; no row means the task doesn't exist
+    try:
+        db_task = db.scalars(
+            update(Task).where(Task.id == task_id).values(**values).returning(Task)
+        ).one_or_none()
+        if db_task is None:
+            db.rollback()
+            return None
+        db.expunge(db_task)
         db.commit()
-        db.refresh(db_task)
-
-        # Generate and store the embedding for the task description
-        embedding = model.encode([f"{title} {description}"])[0]
+    except IntegrityError:
+        db.rollback()
+        raise_missing_user(db, user_id)
+    bump_generation("tasks")
 
-        collection.add(
-            ids=[str(db_task.id)],
-            embeddings=[embedding],
-            metadatas=[{"text": f"{title} {description}"}],
-        )
+    # Re-embedded only if the title or description changed
+    sync_task_index(db_task)
 
     return db_task
 
 
 def delete_task(db: Session, task_id: int):
-    db_task = db.query(Task).filter(Task.id == task_id).first()
+    db_task = db.scalars(
+        delete(Task).where(Task.id == task_id).returning(Task)
+    ).one_or_none()
     if db_task:
-        db.delete(db_task)
+        db.expunge(db_task)
         db.commit()
+        bump_generation("tasks")
+        remove_task_index(task_id)
     return db_task
 
 
-def search_tasks(db: Session, query: str, top_k: int = 5):
-    if query == "":
-        return db.query(Task).all()
+def fts_query(query: str) -> str:
+    """Quote each term so identifiers like PROJ-12 or URLs match as phrases"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
 
-    # Generate the embedding for the query
-    query_embedding = model.encode([query])[0]
+def keyword_search(db: Session, query: str, limit: int) -> List[int]:
+    """Task ids matching every query term in the FTS5 index, best first"""
+    if db.get_bind().dialect.name != "sqlite" or not query.split():
+        return []
+    return list(
+        db.scalars(
+            text(
+                "SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH :query "
+                "ORDER BY rank LIMIT :limit"
+            ),
+            {"query": fts_query(query), "limit": limit},
+        )
+    )
+
+
+def vector_search(query: str, limit: int) -> List[int]:
+    """Task ids nearest to the query embedding, best first"""
+    # Generate the embedding for the query (cached, batched with concurrent searches)
+    query_embedding = embed_query(query)
 
     # Perform the similarity search in the vector database
-    results = collection.query(
+    results = get_collection().query(
         query_embeddings=[query_embedding],
-        n_results=top_k,
+        n_results=limit,
     )
+    return [
+        int(task_id)
+        for task_id, distance in zip(results["ids"][0], results["distances"][0])
+        if distance < settings.search_max_distance
+    ]
 
-    # Destructure
-    ids = results["ids"][0]
-    # metadatas = [m["text"] for m in results["metadatas"][0]]
-    distances = results["distances"][0]
 
-    THRESHOLD = 1  # Adjust threshold as needed
-    task_ids = [
-        int(ids[i]) for i in range(len(distances)) if round(distances[i]) <= THRESHOLD
-    ]
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int) -> List[int]:
+    """Merge rankings by summed 1 / (k + rank); ties keep the first list's order"""
+    scores = {}
+    for ranking in rankings:
+        for rank, task_id in enumerate(ranking, start=1):
+            scores[task_id] = scores.get(task_id, 0.0) + 1 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def keyword_hits_suffice(query: str, hits: List[int], top_k: int) -> bool:
+    # A full page of matches, or a single identifier-like term (Jira key, PR
+    # number, ...) that matched: the embedding model wouldn't add anything
+    if len(hits) >= top_k:
+        return True
+    terms = query.split()
+    return bool(hits) and len(terms) == 1 and any(c.isdigit() for c in terms[0])
+
+
+def search_tasks(db: Session, query: str, top_k: int = 5):
+    """Hybrid search: FTS5 keyword hits fused with vector hits.
+
+    The keyword query takes milliseconds, so it runs first; when its hits
+    suffice the embedding model is never called.
+    """
+    if query == "":
+        return db.query(Task).all()
+
+    task_ids = keyword_search(db, query, top_k)
+    if not keyword_hits_suffice(query, task_ids, top_k):
+        task_ids = reciprocal_rank_fusion(
+            [task_ids, vector_search(query, top_k)], settings.search_rrf_k
+        )[:top_k]
 
     if not task_ids:
         return []
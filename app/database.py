@@ -1,28 +1,228 @@
-from sqlalchemy import create_engine, event
+import threading
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, inspect, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
-import chromadb
+from app.startup import timed
 
 SQLALCHEMY_DATABASE_URL = settings.database_url
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
 
-# Enable foreign key constraint enforcement for SQLite
-@event.listens_for(engine, "connect")
+
+def sqlite_pragmas() -> list:
+    """PRAGMA statements run on every new SQLite connection"""
+    pragmas = ["PRAGMA foreign_keys=ON"]
+    if settings.sqlite_journal_mode:
+        pragmas.append(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    if settings.sqlite_synchronous:
+        pragmas.append(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    pragmas += [
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}",
+        f"PRAGMA cache_size={int(settings.sqlite_cache_size)}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+    ]
+    return pragmas
+
+
+# Enable foreign key constraint enforcement and the tuning pragmas for SQLite
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA foreign_keys=ON")
+    for pragma in sqlite_pragmas():
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def set_query_only(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
     cursor.close()
 
+
+def begin_write(db):
+    """Start the session's SQLite transaction as a write transaction now.
+
+    pysqlite only opens a transaction before INSERT/UPDATE/DELETE, not before
+    SAVEPOINT, so a RELEASE outside one commits on its own. Callers that need
+    savepoints inside one transaction call this first; IMMEDIATE takes the
+    write lock up front, where ``busy_timeout`` can wait for it.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        db.execute(text("BEGIN IMMEDIATE"))
+
+
+def is_memory_database(url: str) -> bool:
+    """In-memory SQLite lives in one connection, so it can't be pooled or shared"""
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and (
+        not parsed.database or ":memory:" in parsed.database
+    )
+
+
+def make_engine(url: str, read_only: bool = False, is_async: bool = False):
+    """Pooled engine for ``url``; read-only engines reject writes at the connection"""
+    pool_size, max_overflow = (
+        (settings.db_read_pool_size, settings.db_read_max_overflow)
+        if read_only
+        else (settings.db_pool_size, settings.db_max_overflow)
+    )
+    # Only QueuePool takes these; in-memory SQLite gets a single-connection pool
+    options = (
+        {}
+        if is_memory_database(url)
+        else dict(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    )
+    if is_async:
+        new_engine = create_async_engine(url, **options)
+        sync_engine = new_engine.sync_engine
+    else:
+        new_engine = create_engine(
+            url, connect_args={"check_same_thread": False}, **options
+        )
+        sync_engine = new_engine
+    if url.startswith("sqlite"):
+        event.listen(sync_engine, "connect", set_sqlite_pragma)
+    if read_only:
+        event.listen(sync_engine, "connect", set_query_only)
+    return new_engine
+
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
+# GET routes read through their own pool so readers never queue behind writers
+read_engine = (
+    make_engine(SQLALCHEMY_DATABASE_URL, read_only=True)
+    if settings.db_read_pool_size > 0
+    and not is_memory_database(SQLALCHEMY_DATABASE_URL)
+    else engine
+)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 
-# ChromaDB client initialization with persistent storage
-# Initialize ChromaDB client with persistent storage
-chroma_client = chromadb.PersistentClient()
+def check_schema(bind):
+    """Fail fast when the database predates the models.
+
+    ``create_all`` only creates missing tables, so a database made by an older
+    release keeps its old ``tasks`` table without the newer columns and the
+    FTS index; every list or search request would then fail.
+    """
+    inspector = inspect(bind)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing += [
+            f"{table.name}.{column.name}"
+            for column in table.columns
+            if column.name not in existing
+        ]
+    if bind.dialect.name == "sqlite" and not inspector.has_table("tasks_fts"):
+        missing.append("tasks_fts")
+    if missing:
+        raise RuntimeError(
+            f"Database schema is out of date (missing {', '.join(missing)}); "
+            "upgrade it with `alembic stamp c2a2e886dd4f && alembic upgrade head` "
+            "if it was created before migrations were used, else `alembic upgrade head`"
+        )
+
+
+# Async engines and session factories for DB_ASYNC mode, created on first use
+_async_engines: dict = {}
+_async_session_factories: dict = {}
+_async_lock = threading.Lock()
+
+
+def get_async_database_url() -> str:
+    if settings.async_database_url:
+        return settings.async_database_url
+    return SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+
+def get_async_engine(read_only: bool = False):
+    # Without a separate read pool, reads share the main async engine
+    read_only = (
+        read_only
+        and settings.db_read_pool_size > 0
+        and not is_memory_database(get_async_database_url())
+    )
+    if read_only not in _async_engines:
+        with _async_lock:
+            if read_only not in _async_engines:
+                _async_engines[read_only] = make_engine(
+                    get_async_database_url(), read_only=read_only, is_async=True
+                )
+    return _async_engines[read_only]
+
+
+def AsyncSessionLocal(read_only: bool = False):
+    async_engine = get_async_engine(read_only)
+    factory = _async_session_factories.get(async_engine)
+    if factory is None:
+        # Objects stay loaded after commit: lazy reloads can't run outside run_sync
+        factory = _async_session_factories[async_engine] = async_sessionmaker(
+            bind=async_engine, autoflush=False, expire_on_commit=False
+        )
+    return factory()
+
+
+async def dispose_async_engine():
+    with _async_lock:
+        engines = list(_async_engines.values())
+        _async_engines.clear()
+        _async_session_factories.clear()
+    for async_engine in engines:
+        await async_engine.dispose()
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """Await a sync ``app.crud``-style function against either kind of session.
+
+    With an ``AsyncSession`` the function runs through ``run_sync``, so its
+    queries go through the async driver on the event loop; with a sync
+    ``Session`` it runs in the threadpool as a plain ``def`` route would.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda session: fn(session, *args, **kwargs))
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+# ChromaDB client and "tasks" collection, opened on first use;
+# ``python -m app.reindex`` rebuilds the collection from the database
+COLLECTION_NAME = "tasks"
+
+_chroma_client = None
+_collection = None
+_chroma_lock = threading.Lock()
+
+
+def get_chroma_client():
+    global _chroma_client
+    if _chroma_client is None:
+        with _chroma_lock:
+            if _chroma_client is None:
+                with timed("chroma_client"):
+                    import chromadb
+
+                    # Initialize ChromaDB client with persistent storage
+                    _chroma_client = chromadb.PersistentClient(
+                        path=settings.chroma_path
+                    )
+    return _chroma_client
+
 
-# Create or get a collection named "tasks"
-collection = chroma_client.get_or_create_collection("tasks")
+def get_collection():
+    global _collection
+    if _collection is None:
+        client = get_chroma_client()
+        with _chroma_lock:
+            if _collection is None:
+                with timed("chroma_collection"):
+                    _collection = client.get_or_create_collection(COLLECTION_NAME)
+    return _collection
@@ -0,0 +1,141 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+from app.config import settings
+from app.lru import LRUCache
+from app.startup import timed
+
+# Shared SentenceTransformer used for task and query embeddings, loaded on first use
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                with timed("embedding_model"):
+                    from sentence_transformers import SentenceTransformer
+
+                    _model = SentenceTransformer(settings.embedding_model)
+    return _model
+
+
+class QueryEmbedder:
+    """Coalesces concurrent query encodes into batched ``model.encode`` calls.
+
+    Callers block on their own future; a worker thread collects queries that
+    arrive within ``window_ms`` (up to ``max_batch``) and encodes them together.
+    """
+
+    def __init__(
+        self,
+        window_ms: float = settings.search_batch_window_ms,
+        max_batch: int = settings.search_batch_max_size,
+    ):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    def embed(self, text: str):
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "queries": self.queries,
+            "batches": self.batches,
+            "avg_batch_size": (
+                round(self.queries / self.batches, 2) if self.batches else 0.0
+            ),
+            "largest_batch": self.largest_batch,
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="query-embedder", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(
+                        self._queue.get(timeout=remaining)
+                        if remaining > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+            self._encode(batch)
+
+    def _encode(self, batch):
+        try:
+            embeddings = get_model().encode([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), embedding in zip(batch, embeddings):
+            future.set_result(embedding)
+        self.queries += len(batch)
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+
+query_embedder = QueryEmbedder()
+
+
+def normalize_query(text: str) -> str:
+    """Fold case and collapse whitespace so trivially different queries match"""
+    return " ".join(text.split()).casefold()
+
+
+class EmbeddingCache(LRUCache):
+    """Bounded LRU cache of query embeddings with a per-entry TTL.
+
+    Keys include the model name so swapping models never serves vectors
+    produced by the previous one.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = settings.query_cache_size,
+        ttl: float = settings.query_cache_ttl,
+    ):
+        super().__init__(maxsize, ttl)
+
+
+query_cache = EmbeddingCache()
+
+
+def embed_query(text: str):
+    """Embed a search query, serving repeated queries from ``query_cache``"""
+    normalized = normalize_query(text)
+    key = (settings.embedding_model, normalized)
+    embedding = query_cache.get(key)
+    if embedding is None:
+        embedding = query_embedder.embed(normalized)
+        query_cache.set(key, embedding)
+    return embedding
@@ -0,0 +1,295 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.config import settings
+from app.database import get_collection
+from app.embeddings import get_model
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexJob:
+    task_id: int
+    text: Optional[str]  # None removes the task from the index
+    metadata: dict
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+_STOP = object()
+
+
+class TaskIndexer:
+    """Background worker that embeds tasks and writes them to Chroma in batches.
+
+    The request path only enqueues jobs; a single worker thread drains the
+    queue in micro-batches so many descriptions share one ``model.encode``
+    call and one ``collection.upsert`` call. Each entry stores a
+    ``content_hash`` of its text; when a job's hash matches the stored one
+    only the metadata is updated and the model is skipped.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.index_batch_size,
+        flush_interval: float = settings.index_flush_interval,
+        maxsize: int = settings.index_queue_size,
+        max_attempts: int = settings.index_max_attempts,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._in_flight: list = []
+        self.indexed = 0
+        self.embedded = 0
+        self.metadata_only = 0
+        self.removed = 0
+        self.retried = 0
+        self.dropped = 0
+        self.failed = 0  # Jobs given up on, including dropped ones
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_batch_seconds = 0.0
+        self.last_batch_lag_seconds = 0.0
+        self.last_indexed_at: Optional[float] = None
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="task-indexer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Flush everything still queued, then stop the worker."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def enqueue(self, task_id: int, text: str, metadata: dict):
+        self._put(IndexJob(task_id=task_id, text=text, metadata=metadata))
+
+    def remove(self, task_id: int):
+        self._put(IndexJob(task_id=task_id, text=None, metadata={}))
+
+    def _put(self, job: IndexJob) -> bool:
+        # Never block the caller: with the async database mode this runs on
+        # the event loop, and a stalled indexer would freeze every request
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            self.failed += 1
+            logger.warning(
+                "Index queue full, dropped task %d; run `python -m app.reindex` "
+                "to repair the index",
+                job.task_id,
+            )
+            return False
+
+    def _oldest_pending(self) -> Optional[float]:
+        in_flight = self._in_flight
+        if in_flight:
+            return in_flight[0].enqueued_at
+        with self._queue.mutex:
+            for item in self._queue.queue:
+                if isinstance(item, IndexJob):
+                    return item.enqueued_at
+        return None
+
+    def stats(self) -> dict:
+        oldest = self._oldest_pending()
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "queue_depth": self._queue.qsize(),
+            "in_flight": len(self._in_flight),
+            "index_lag_seconds": (
+                round(time.monotonic() - oldest, 3) if oldest is not None else 0.0
+            ),
+            "indexed": self.indexed,
+            "embedded": self.embedded,
+            "metadata_only": self.metadata_only,
+            "removed": self.removed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            # Failed jobs are only repaired by a full reindex
+            "reindex_needed": self.failed > 0,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_seconds": round(self.last_batch_seconds, 4),
+            "last_batch_lag_seconds": round(self.last_batch_lag_seconds, 3),
+            "seconds_since_last_index": (
+                round(time.monotonic() - self.last_indexed_at, 3)
+                if self.last_indexed_at is not None
+                else None
+            ),
+        }
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch, stop = self._collect(item)
+            written = self._write(batch)
+            if not written and not stop:
+                # Back off before retrying so a down store isn't hammered
+                time.sleep(self.flush_interval)
+            if stop:
+                # Write whatever arrived before the stop sentinel was seen
+                self._drain_inline()
+                return
+
+    def _collect(self, first):
+        """Gather up to ``batch_size`` jobs, waiting at most ``flush_interval``."""
+        batch, stop = self._in_flight, False
+        deadline = time.monotonic() + self.flush_interval
+        item = first
+        while True:
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                break
+            remaining = deadline - time.monotonic()
+            try:
+                item = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+        return batch, stop
+
+    def _drain_inline(self):
+        while True:
+            batch = self._in_flight
+            try:
+                while len(batch) < self.batch_size:
+                    item = self._queue.get_nowait()
+                    if item is not _STOP:
+                        batch.append(item)
+            except queue.Empty:
+                pass
+            self._write(batch)
+            if not batch:
+                return
+
+    def _write(self, batch) -> bool:
+        """Write a batch; returns False if it failed and was retried or dropped"""
+        if not batch:
+            return True
+        self._in_flight = []
+
+        # Later jobs for the same task supersede earlier (or retried) ones
+        latest = {}
+        for job in batch:
+            current = latest.get(job.task_id)
+            if current is None or job.enqueued_at >= current.enqueued_at:
+                latest[job.task_id] = job
+        jobs = list(latest.values())
+
+        started = time.monotonic()
+        try:
+            collection = get_collection()
+            removed = [job for job in jobs if job.text is None]
+            upserts = [job for job in jobs if job.text is not None]
+            if removed:
+                collection.delete(ids=[str(job.task_id) for job in removed])
+            changed, unchanged = self._split_unchanged(collection, upserts)
+            if changed:
+                embeddings = get_model().encode([job.text for job in changed])
+                collection.upsert(
+                    ids=[str(job.task_id) for job in changed],
+                    embeddings=embeddings,
+                    metadatas=[job.metadata for job in changed],
+                )
+            if unchanged:
+                collection.update(
+                    ids=[str(job.task_id) for job in unchanged],
+                    metadatas=[job.metadata for job in unchanged],
+                )
+        except Exception:
+            logger.exception("Failed to index %d task(s)", len(jobs))
+            self._retry(jobs)
+            return False
+        else:
+            self.indexed += len(jobs)
+            self.embedded += len(changed)
+            self.metadata_only += len(unchanged)
+            self.removed += len(removed)
+            self.last_indexed_at = time.monotonic()
+            self.last_batch_lag_seconds = self.last_indexed_at - min(
+                job.enqueued_at for job in batch
+            )
+            return True
+        finally:
+            self.batches += 1
+            self.last_batch_size = len(jobs)
+            self.last_batch_seconds = time.monotonic() - started
+
+    def _retry(self, jobs):
+        """Requeue failed jobs until they run out of attempts"""
+        # A newer job already queued for the same task must not be overwritten
+        # by a stale retry written after it
+        with self._queue.mutex:
+            queued = {
+                item.task_id for item in self._queue.queue if isinstance(item, IndexJob)
+            }
+        given_up = 0
+        for job in jobs:
+            if job.task_id in queued:
+                continue
+            job.attempts += 1
+            if job.attempts < self.max_attempts:
+                if self._put(job):
+                    self.retried += 1
+            else:
+                given_up += 1
+        if given_up:
+            self.failed += given_up
+            logger.error(
+                "Gave up indexing %d task(s) after %d attempts; run "
+                "`python -m app.reindex` to repair the index",
+                given_up,
+                self.max_attempts,
+            )
+
+    def _split_unchanged(self, collection, jobs):
+        """Split jobs into those whose text changed and metadata-only updates"""
+        if not jobs:
+            return [], []
+        stored = collection.get(
+            ids=[str(job.task_id) for job in jobs], include=["metadatas"]
+        )
+        hashes = {
+            task_id: (metadata or {}).get("content_hash")
+            for task_id, metadata in zip(stored["ids"], stored["metadatas"])
+        }
+        changed, unchanged = [], []
+        for job in jobs:
+            stored_hash = hashes.get(str(job.task_id))
+            if stored_hash is not None and stored_hash == job.metadata["content_hash"]:
+                unchanged.append(job)
+            else:
+                changed.append(job)
+        return changed, unchanged
+
+
+indexer = TaskIndexer()
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from typing import Optional, Tuple
+
+from anyio import to_thread
+
+from app.config import settings
+from app.lru import LRUCache
+from app.model_manager import model_manager
+from app.startup import timed
+
+
+def is_deterministic(options: dict) -> bool:
+    """Only greedy decoding gives the same output for the same input"""
+    return options.get("temperature") == 0
+
+
+def cache_key(endpoint: str, model: str, digest: str, payload, options: dict) -> str:
+    raw = json.dumps(
+        [endpoint, model, digest, payload, options], sort_keys=True, default=str
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class DiskTier:
+    """SQLite-backed second tier that survives restarts and is shared by workers"""
+
+    def __init__(self, path: str, maxsize: int):
+        self.path = path
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_cache_created_at "
+                "ON llm_cache (created_at)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """A short-lived connection that commits (or rolls back) and closes on exit"""
+        # sqlite3's own context manager only ends the transaction
+        with closing(sqlite3.connect(self.path, timeout=5)) as conn, conn:
+            yield conn
+
+    def get(self, key: str) -> Optional[Tuple[dict, float]]:
+        """The cached value and its expiry as a ``time.time()`` timestamp"""
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: dict, ttl: float):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            # Drop the oldest entries beyond the size limit
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache "
+                "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+    def size(self) -> int:
+        with self._lock, self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class CompletionCache:
+    """Opt-in cache of deterministic LLM responses.
+
+    Entries are keyed on the endpoint, model name and digest, the prompt or
+    messages and the generation options. Lookups go to an in-memory LRU
+    first and then to the optional SQLite tier, whose hits are promoted.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.llm_cache_enabled,
+        maxsize: int = settings.llm_cache_size,
+        ttl: float = settings.llm_cache_ttl,
+        disk_path: str = settings.llm_cache_path,
+        disk_maxsize: int = settings.llm_cache_disk_size,
+    ):
+        self.enabled = enabled
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_path = disk_path if enabled else ""
+        self.disk_maxsize = disk_maxsize
+        # Opened on first use so importing the app never touches the file
+        self._disk: Optional[DiskTier] = None
+        self._disk_lock = threading.Lock()
+        self._entries = LRUCache(maxsize, ttl)
+        self._counts: dict = {}
+
+    @property
+    def disk(self) -> Optional[DiskTier]:
+        if self.disk_path and self._disk is None:
+            with self._disk_lock:
+                if self._disk is None:
+                    with timed("llm_cache_disk"):
+                        self._disk = DiskTier(self.disk_path, self.disk_maxsize)
+        return self._disk
+
+    def _count(self, endpoint: str, outcome: str):
+        counts = self._counts.setdefault(
+            endpoint, {"hits": 0, "disk_hits": 0, "misses": 0, "skipped": 0}
+        )
+        counts[outcome] += 1
+
+    async def key_for(self, endpoint: str, model: str, payload, options: dict):
+        """Cache key for this request, or None when it must not be cached"""
+        if not self.enabled or not is_deterministic(options):
+            self._count(endpoint, "skipped")
+            return None
+        try:
+            # Keyed on the digest so re-pulling a model starts a fresh cache
+            digest = await model_manager.digest(model)
+        except Exception:
+            digest = None
+        if digest is None:
+            self._count(endpoint, "skipped")
+            return None
+        return cache_key(endpoint, model, digest, payload, options)
+
+    async def get(self, endpoint: str, key: str) -> Optional[dict]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._count(endpoint, "hits")
+            return value
+        if self.disk is not None:
+            row = await to_thread.run_sync(self.disk.get, key)
+            if row is not None:
+                value, expires_at = row
+                self._count(endpoint, "disk_hits")
+                # Promoted entries keep the disk row's expiry, not a fresh ttl
+                remaining = expires_at - time.time()
+                self._entries.set(key, value, expires_at=time.monotonic() + remaining)
+                return value
+        self._count(endpoint, "misses")
+        return None
+
+    async def set(self, key: str, value: dict):
+        self._entries.set(key, value)
+        if self.disk is not None:
+            await to_thread.run_sync(self.disk.set, key, value, self.ttl)
+
+    def clear(self):
+        self._entries.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        endpoints = {}
+        for endpoint, counts in self._counts.items():
+            lookups = counts["hits"] + counts["disk_hits"] + counts["misses"]
+            hits = counts["hits"] + counts["disk_hits"]
+            endpoints[endpoint] = {
+                **counts,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "evictions": self._entries.evictions,
+            "disk_size": self.disk.size() if self.disk is not None else None,
+            "endpoints": endpoints,
+        }
+
+
+completion_cache = CompletionCache()
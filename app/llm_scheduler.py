@@ -0,0 +1,170 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.config import settings
+
+
+class LLMScheduler:
+    """Admission control in front of Ollama generations.
+
+    At most ``max_concurrency`` generations run at once. Further requests wait
+    in a bounded queue; when a slot frees up it goes to the next user in
+    round-robin order, so one user's burst can't starve everyone else.
+    Requests are rejected up front (429 for a user over their share, 503
+    otherwise, both with ``Retry-After``) when the queue is full or the
+    estimated wait would exceed ``deadline`` seconds.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = settings.llm_max_concurrency,
+        max_queue: int = settings.llm_queue_size,
+        max_queue_per_user: int = settings.llm_queue_per_user,
+        deadline: float = settings.llm_queue_deadline,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.deadline = deadline
+        self._waiting: OrderedDict = OrderedDict()  # user -> deque of futures
+        self.running = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_user_limit = 0
+        self.rejected_deadline = 0
+        self.timed_out = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        # Moving average of generation time, used to estimate queue waits
+        self.avg_service_seconds: Optional[float] = None
+
+    def estimated_wait(self, ahead: int) -> float:
+        """Seconds until a request with ``ahead`` requests queued before it starts"""
+        if self.avg_service_seconds is None:
+            return 0.0
+        rounds = ahead // self.max_concurrency + 1
+        return rounds * self.avg_service_seconds
+
+    def _reject(self, status_code: int, detail: str, wait: float):
+        raise HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+
+    def check(self, user: str):
+        """Raise the rejection ``acquire`` would raise right now, if any"""
+        if self.running < self.max_concurrency and not self.queued:
+            return
+        wait = self.estimated_wait(self.queued)
+        if self.queued >= self.max_queue:
+            self.rejected_queue_full += 1
+            self._reject(503, "LLM queue is full", wait)
+        if len(self._waiting.get(user, ())) >= self.max_queue_per_user:
+            self.rejected_user_limit += 1
+            self._reject(429, "Too many queued LLM requests for this user", wait)
+        if wait > self.deadline:
+            self.rejected_deadline += 1
+            self._reject(503, "LLM queue wait would exceed the deadline", wait)
+
+    async def acquire(self, user: str):
+        self.check(user)
+        enqueued = time.monotonic()
+        if self.running < self.max_concurrency and not self.queued:
+            self.running += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._waiting.setdefault(user, deque()).append(future)
+            self.queued += 1
+            try:
+                await asyncio.wait_for(asyncio.shield(future), self.deadline)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if future.done():
+                    # The slot was handed over just as we gave up; pass it on
+                    self.release()
+                else:
+                    future.cancel()
+                    self._discard(user, future)
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                self.timed_out += 1
+                self._reject(503, "Timed out waiting for an LLM slot", self.deadline)
+        waited = time.monotonic() - enqueued
+        self.admitted += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def _discard(self, user: str, future: asyncio.Future):
+        waiters = self._waiting.get(user)
+        if waiters is not None and future in waiters:
+            waiters.remove(future)
+            self.queued -= 1
+            if not waiters:
+                del self._waiting[user]
+
+    def release(self, service_seconds: Optional[float] = None):
+        if service_seconds is not None:
+            self.avg_service_seconds = (
+                service_seconds
+                if self.avg_service_seconds is None
+                else 0.8 * self.avg_service_seconds + 0.2 * service_seconds
+            )
+        # Hand the slot straight to the next user in round-robin order
+        while self._waiting:
+            user, waiters = next(iter(self._waiting.items()))
+            future = waiters.popleft()
+            self.queued -= 1
+            if waiters:
+                self._waiting.move_to_end(user)
+            else:
+                del self._waiting[user]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.running -= 1
+
+    @asynccontextmanager
+    async def slot(self, user: str):
+        await self.acquire(user)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_queue_per_user": self.max_queue_per_user,
+            "deadline_seconds": self.deadline,
+            "running": self.running,
+            "queue_depth": self.queued,
+            "queued_by_user": {user: len(w) for user, w in self._waiting.items()},
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_user_limit": self.rejected_user_limit,
+            "rejected_deadline": self.rejected_deadline,
+            "timed_out": self.timed_out,
+            "avg_wait_seconds": (
+                round(self.total_wait_seconds / self.admitted, 4)
+                if self.admitted
+                else 0.0
+            ),
+            "max_wait_seconds": round(self.max_wait_seconds, 4),
+            "avg_service_seconds": (
+                round(self.avg_service_seconds, 4)
+                if self.avg_service_seconds is not None
+                else None
+            ),
+        }
+
+
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class LRUCache:
+    """Thread-safe LRU cache on an ``OrderedDict`` with optional entry expiry.
+
+    Entries expire ``ttl`` seconds after they are set (never when ``ttl`` is
+    None) or at an explicit ``expires_at``, measured on ``clock``. A
+    ``maxsize`` of 0 disables the cache.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, expires_at: Optional[float] = None):
+        if self.maxsize <= 0:
+            return
+        if self.ttl is not None:
+            # An explicit expiry can shorten the ttl but never extend it
+            ttl_expiry = self.clock() + self.ttl
+            if expires_at is None or expires_at > ttl_expiry:
+                expires_at = ttl_expiry
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard_where(self, predicate: Callable[[object], bool]) -> int:
+        """Drop every entry whose value matches ``predicate``; returns the count"""
+        with self._lock:
+            stale = [
+                key for key, (_, value) in self._entries.items() if predicate(value)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {"size": len(self._entries), "maxsize": self.maxsize}
+        if self.ttl is not None:
+            stats["ttl_seconds"] = self.ttl
+        return {
+            **stats,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
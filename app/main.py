@@ -1,10 +1,28 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Response
-from app.database import Base, engine
-from app.routers import users, items, tasks, llm
 from fastapi.middleware.cors import CORSMiddleware
-import hashlib
+from app.auth import decode_access_token
+from app.cache import current_etag, etag_matches
+from app.config import settings
+from app.startup import timed
 
-Base.metadata.create_all(bind=engine)
+with timed("import_database"):
+    from app.database import (
+        Base,
+        check_schema,
+        dispose_async_engine,
+        engine,
+        get_collection,
+    )
+with timed("import_routers"):
+    from app.routers import users, items, tasks, llm, metrics
+from app.embeddings import get_model
+from app.indexing import indexer
+from app.model_manager import model_manager
+from app.ollama_client import close_ollama_client
+from app.passwords import password_hasher
 
 origins = [
     "http://localhost",
@@ -12,7 +30,39 @@ origins = [
     "http://localhost:3000",
 ]
 
-app = FastAPI()
+
+def warm_up():
+    """Load the embedding model and open the vector store ahead of first use"""
+    get_model()
+    get_collection()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with timed("database_schema"):
+        Base.metadata.create_all(bind=engine)
+        check_schema(engine)
+    if settings.warmup_on_startup:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    indexer.start()
+    preload_models = [
+        m.strip() for m in settings.ollama_preload_models.split(",") if m.strip()
+    ]
+    preload = None
+    if preload_models:
+        # Load models in the background so startup doesn't wait on Ollama
+        preload = asyncio.create_task(model_manager.preload_all(preload_models))
+    yield
+    if preload is not None:
+        preload.cancel()
+    # Flush pending embeddings before the worker exits
+    indexer.stop()
+    password_hasher.shutdown()
+    await dispose_async_engine()
+    await close_ollama_client()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,43 +70,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
+def has_valid_token(request: Request) -> bool:
+    """Check the bearer token's signature and expiry without touching the DB"""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and decode_access_token(token) is not None
+
+
 @app.middleware("http")
 async def add_cache_headers(request: Request, call_next):
-    response: Response = await call_next(request)
-    if not request.url.path.startswith("/tasks"):
-        return response
-    # Read response body (StreamingResponse has .body_iterator)
-    body = b""
-    async for chunk in response.body_iterator:
-        body += chunk
-
-    # Create a fresh Response with captured body
-    new_response = Response(
-        content=body,
-        status_code=response.status_code,
-        headers=dict(response.headers),  # copy original headers
-        media_type=response.media_type,
-    )
-
-    # Generate ETag based on response content
-    etag = hashlib.md5(body).hexdigest()
-    new_response.headers["ETag"] = etag
+    path = request.url.path
+    # Search results depend on the vector index, not just the tasks table
+    if (
+        request.method != "GET"
+        or not path.startswith("/tasks")
+        or path.startswith("/tasks/search")
+    ):
+        return await call_next(request)
 
-    # Check if the ETag matches the If-None-Match header
-    if_none_match = request.headers.get("If-None-Match")
-    if if_none_match == etag:
-        return Response(status_code=304)
+    # Taken before the handler runs so a concurrent write can only make it stale
+    etag = current_etag("tasks")
+    cache_headers = {"ETag": etag, "Cache-Control": "private, max-age=300"}
 
-    # Set Cache-Control header for 5 minutes
-    new_response.headers["Cache-Control"] = "private, max-age=300"
+    # Answer revalidations without running the route or reading any table
+    if etag_matches(request.headers.get("If-None-Match"), etag) and has_valid_token(
+        request
+    ):
+        return Response(status_code=304, headers=cache_headers)
 
-    return new_response
+    response: Response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(cache_headers)
+    return response
 
 
 app.include_router(users.router, prefix="/users", tags=["users"])
 app.include_router(items.router, prefix="/items", tags=["items"])
 app.include_router(llm.router, prefix="/llm", tags=["llm"])
 app.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
+app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional, Union
+
+from app.config import settings
+from app.ollama_client import get_ollama_client
+
+logger = logging.getLogger(__name__)
+
+
+def full_name(model: str) -> str:
+    """Ollama reports untagged models under their ``latest`` tag"""
+    return model if ":" in model else f"{model}:latest"
+
+
+def parse_keep_alive(value: str) -> Optional[Union[float, str]]:
+    """Ollama takes durations like ``"30m"`` or a number of seconds (-1 = forever)"""
+    if value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class ModelManager:
+    """Keeps track of which Ollama models exist and which are loaded.
+
+    The model list is cached for ``ttl`` seconds and dropped by ``invalidate``
+    whenever a model is pulled or deleted. Generations are sent with a
+    per-model ``keep_alive`` so Ollama keeps models resident between
+    requests, ``preload`` loads models ahead of the first request, and every
+    load duration Ollama reports is recorded per model.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.ollama_models_cache_ttl,
+        keep_alive: str = settings.ollama_keep_alive,
+        model_keep_alive: Optional[dict] = None,
+    ):
+        self.ttl = ttl
+        self.default_keep_alive = keep_alive
+        self.model_keep_alive = (
+            settings.ollama_model_keep_alive
+            if model_keep_alive is None
+            else model_keep_alive
+        )
+        self._models: Optional[list] = None
+        self._fetched_at = 0.0
+        self._generation = 0  # Bumped on invalidate so stale fetches aren't stored
+        self._lock = asyncio.Lock()
+        self.list_hits = 0
+        self.list_misses = 0
+        self._loads: dict = {}
+
+    async def list_models(self) -> list:
+        if self._models is not None and time.monotonic() - self._fetched_at < self.ttl:
+            self.list_hits += 1
+            return self._models
+        async with self._lock:
+            # Another request may have refreshed the list while we waited
+            if (
+                self._models is not None
+                and time.monotonic() - self._fetched_at < self.ttl
+            ):
+                self.list_hits += 1
+                return self._models
+            self.list_misses += 1
+            generation = self._generation
+            response = await get_ollama_client().list()
+            models = list(response.models)
+            if generation == self._generation:
+                self._models = models
+                self._fetched_at = time.monotonic()
+            return models
+
+    def invalidate(self):
+        self._generation += 1
+        self._models = None
+
+    async def digest(self, model: str) -> Optional[str]:
+        digests = {m.model: m.digest for m in await self.list_models()}
+        return digests.get(model) or digests.get(full_name(model))
+
+    def keep_alive(self, model: str) -> Optional[Union[float, str]]:
+        value = self.model_keep_alive.get(model)
+        if value is None:
+            value = self.model_keep_alive.get(model.split(":")[0])
+        return parse_keep_alive(self.default_keep_alive if value is None else value)
+
+    def record_load(self, model: str, load_duration_ns: Optional[int]):
+        """Record the load time Ollama reported for a request or preload"""
+        if load_duration_ns is None:
+            return
+        seconds = load_duration_ns / 1e9
+        loads = self._loads.setdefault(
+            full_name(model),
+            {
+                "requests": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+                "last_seconds": 0.0,
+            },
+        )
+        loads["requests"] += 1
+        loads["total_seconds"] += seconds
+        loads["max_seconds"] = max(loads["max_seconds"], seconds)
+        loads["last_seconds"] = seconds
+
+    async def preload(self, model: str) -> float:
+        """Load ``model`` into memory without generating; returns the load seconds"""
+        # An empty prompt only loads the model
+        response = await get_ollama_client().generate(
+            model=model, prompt="", keep_alive=self.keep_alive(model)
+        )
+        self.record_load(model, response.get("load_duration"))
+        return (response.get("load_duration") or 0) / 1e9
+
+    async def preload_all(self, models: List[str]):
+        for model in models:
+            try:
+                seconds = await self.preload(model)
+                logger.info("Preloaded model %s in %.2fs", model, seconds)
+            except Exception:
+                logger.exception("Error preloading model %s", model)
+
+    async def status(self) -> dict:
+        """Models currently loaded by Ollama, with keep-alive and load times"""
+        response = await get_ollama_client().ps()
+        warm = {
+            m.model: {
+                "expires_at": m.expires_at.isoformat() if m.expires_at else None,
+                "size": m.size,
+                "size_vram": m.size_vram,
+            }
+            for m in response.models
+        }
+        names = sorted(set(warm) | set(self._loads))
+        return {
+            "models": [
+                {
+                    "name": name,
+                    "warm": name in warm,
+                    **(warm.get(name) or {}),
+                    "keep_alive": self.keep_alive(name),
+                    "load_times": self.load_stats(name),
+                }
+                for name in names
+            ],
+            "list_cache": {
+                "ttl_seconds": self.ttl,
+                "hits": self.list_hits,
+                "misses": self.list_misses,
+            },
+        }
+
+    def load_stats(self, model: str) -> Optional[dict]:
+        loads = self._loads.get(full_name(model))
+        if loads is None:
+            return None
+        return {
+            "requests": loads["requests"],
+            "avg_seconds": round(loads["total_seconds"] / loads["requests"], 4),
+            "max_seconds": round(loads["max_seconds"], 4),
+            "last_seconds": round(loads["last_seconds"], 4),
+        }
+
+
+model_manager = ModelManager()
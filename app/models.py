@@ -1,7 +1,26 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import (
+    DDL,
+    Column,
+    Computed,
+    Integer,
+    Index,
+    String,
+    ForeignKey,
+    DateTime,
+    event,
+)
 from sqlalchemy.sql import func
 from app.database import Base
 
+# Sort rank for task priority: high -> medium -> low -> anything else
+PRIORITY_RANKS = {"high": 1, "medium": 2, "low": 3}
+PRIORITY_RANK_ELSE = 4
+PRIORITY_RANK_SQL = (
+    "CASE priority "
+    + " ".join(f"WHEN '{name}' THEN {rank}" for name, rank in PRIORITY_RANKS.items())
+    + f" ELSE {PRIORITY_RANK_ELSE} END"
+)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -24,6 +43,8 @@ class Task(Base):
     description = Column(String)
     status = Column(String)
     priority = Column(String, default="medium")
+    # Stored so listing queries can sort by priority through an index
+    priority_rank = Column(Integer, Computed(PRIORITY_RANK_SQL, persisted=True))
     user_id = Column(Integer, ForeignKey("users.id"))
     start_date = Column(DateTime)
     end_date = Column(DateTime)
@@ -32,3 +53,44 @@ class Task(Base):
     jira_link = Column(String)
     created_by = Column(Integer, ForeignKey("users.id"))
     pull_requests_links = Column(String)
+
+    # Composite indexes matching the listing filters and their (rank, id) order
+    __table_args__ = (
+        Index("ix_tasks_priority_rank_id", "priority_rank", "id"),
+        Index("ix_tasks_user_id_priority_rank_id", "user_id", "priority_rank", "id"),
+        Index("ix_tasks_status_priority_rank_id", "status", "priority_rank", "id"),
+        Index("ix_tasks_start_date_end_date", "start_date", "end_date"),
+        Index("ix_tasks_created_by", "created_by"),
+        # Overdue filters/counts: end_date range scan, status checked in the index
+        Index("ix_tasks_end_date_status", "end_date", "status"),
+    )
+
+
+# SQLite FTS5 index over the fields people search for verbatim (Jira keys, PR
+# links, ...). It reads rows from tasks and is kept in sync by triggers; the
+# update trigger only fires when one of the indexed columns changes.
+TASK_FTS_FIELDS = ["title", "description", "jira_link", "pull_requests_links"]
+TASK_FTS_COLUMNS = ", ".join(TASK_FTS_FIELDS)
+TASK_FTS_NEW = ", ".join(["new.id"] + [f"new.{name}" for name in TASK_FTS_FIELDS])
+TASK_FTS_OLD = ", ".join(["old.id"] + [f"old.{name}" for name in TASK_FTS_FIELDS])
+TASK_FTS_INSERT = (
+    f"INSERT INTO tasks_fts(rowid, {TASK_FTS_COLUMNS}) VALUES ({TASK_FTS_NEW});"
+)
+TASK_FTS_REMOVE = (
+    f"INSERT INTO tasks_fts(tasks_fts, rowid, {TASK_FTS_COLUMNS}) "
+    f"VALUES ('delete', {TASK_FTS_OLD});"
+)
+TASK_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE tasks_fts USING fts5({TASK_FTS_COLUMNS}, "
+    "content='tasks', content_rowid='id')",
+    f"CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks "
+    f"BEGIN {TASK_FTS_INSERT} END",
+    f"CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks "
+    f"BEGIN {TASK_FTS_REMOVE} END",
+    f"CREATE TRIGGER tasks_fts_update AFTER UPDATE OF {TASK_FTS_COLUMNS} ON tasks "
+    f"BEGIN {TASK_FTS_REMOVE} {TASK_FTS_INSERT} END",
+]
+for statement in TASK_FTS_DDL:
+    event.listen(
+        Task.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
@@ -0,0 +1,31 @@
+from typing import Optional
+
+import httpx
+import ollama
+
+from app.config import settings
+
+# Shared AsyncClient so every LLM request reuses pooled keep-alive connections
+_client: Optional[ollama.AsyncClient] = None
+
+
+def get_ollama_client() -> ollama.AsyncClient:
+    global _client
+    if _client is None:
+        _client = ollama.AsyncClient(
+            host=settings.ollama_host,
+            timeout=settings.ollama_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.ollama_max_connections,
+                max_keepalive_connections=settings.ollama_max_keepalive,
+                keepalive_expiry=settings.ollama_keepalive_expiry,
+            ),
+        )
+    return _client
+
+
+async def close_ollama_client():
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.close()
@@ -0,0 +1,140 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.config import settings
+
+# Hashes made with a different bcrypt cost are flagged for rehash on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds
+)
+
+
+def _hash(password: str):
+    return time.time(), pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str):
+    return time.time(), pwd_context.verify_and_update(password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, bounded executor off the request threadpool.
+
+    ``mode`` is ``"thread"`` or ``"process"``; the process pool runs hashing
+    outside the GIL. At most ``max_pending`` calls may be queued or running;
+    beyond that callers get a 503 instead of piling up.
+    """
+
+    def __init__(
+        self,
+        mode: str = settings.password_hash_executor,
+        workers: int = settings.password_hash_workers,
+        max_pending: int = settings.password_hash_max_pending,
+    ):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {mode}")
+        self.mode = mode
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.total_queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.mode == "process":
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="bcrypt"
+                        )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many concurrent password operations",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+        submitted = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started, result = await loop.run_in_executor(
+                self._get_executor(), fn, *args
+            )
+        finally:
+            with self._lock:
+                self.pending -= 1
+        finished = time.time()
+        with self._lock:
+            queue_seconds = max(started - submitted, 0.0)
+            self.completed += 1
+            self.total_queue_seconds += queue_seconds
+            self.max_queue_seconds = max(self.max_queue_seconds, queue_seconds)
+            self.total_run_seconds += finished - started
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also return a new hash if the stored one is outdated"""
+        return await self._run(_verify_and_update, password, hashed_password)
+
+    def record_rehash(self):
+        """Count a stored hash upgraded to the current bcrypt cost"""
+        with self._lock:
+            self.rehashed += 1
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        completed = self.completed
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "bcrypt_rounds": settings.bcrypt_rounds,
+            "pending": self.pending,
+            "completed": completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "avg_queue_seconds": (
+                round(self.total_queue_seconds / completed, 4) if completed else 0.0
+            ),
+            "max_queue_seconds": round(self.max_queue_seconds, 4),
+            "avg_run_seconds": (
+                round(self.total_run_seconds / completed, 4) if completed else 0.0
+            ),
+        }
+
+
+password_hasher = PasswordHasher()
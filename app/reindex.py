@@ -0,0 +1,201 @@
+"""Rebuild the task vector collection from the database.
+
+Usage: python -m app.reindex [--chunk-size 1000] [--workers 1] [--restart]
+
+Tasks are streamed from SQL in id order, ``--chunk-size`` at a time, encoded
+(across ``--workers`` processes, or the ``--devices`` given, with
+SentenceTransformer's multi-process pool) and written into a separate build
+collection. Progress is kept in that collection's metadata, so an interrupted
+run picks up after the last chunk written. Once every task is in, the build
+collection is renamed to the live name and the old one dropped, so search
+never sees a half-built index. Chroma can't swap two names atomically, so the
+live collection is parked under a fixed name first; the next run finishes or
+undoes a swap that was cut short. Chroma's local client isn't shared between
+processes: run this while the API is stopped, or restart the API afterwards.
+"""
+import argparse
+import time
+
+from chromadb.errors import NotFoundError
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.crud import task_index_metadata, task_index_text
+from app.database import COLLECTION_NAME, ReadSessionLocal, get_chroma_client
+from app.embeddings import get_model
+from app.models import Task
+
+BUILD_NAME = f"{COLLECTION_NAME}_reindex"
+# The previous live collection while a swap is in progress
+SWAP_NAME = f"{COLLECTION_NAME}_swap"
+
+
+def progress_metadata(last_task_id: int, indexed: int) -> dict:
+    return {
+        "embedding_model": settings.embedding_model,
+        "last_task_id": last_task_id,
+        "indexed": indexed,
+    }
+
+
+def find_collection(client, name: str):
+    try:
+        return client.get_collection(name)
+    except NotFoundError:
+        return None
+
+
+def open_build_collection(client, restart: bool):
+    """The build collection, the last task id written to it and the count so far"""
+    build = find_collection(client, BUILD_NAME)
+    if build is not None:
+        metadata = build.metadata or {}
+        # A build made with another embedding model can't be resumed
+        if not restart and metadata.get("embedding_model") == settings.embedding_model:
+            return build, metadata.get("last_task_id", 0), metadata.get("indexed", 0)
+        client.delete_collection(BUILD_NAME)
+    build = client.create_collection(BUILD_NAME, metadata=progress_metadata(0, 0))
+    return build, 0, 0
+
+
+def fetch_chunk(after_id: int, chunk_size: int):
+    # A short read per chunk, so no transaction stays open while encoding
+    with ReadSessionLocal() as db:
+        return db.execute(
+            select(Task.id, Task.title, Task.description, Task.status, Task.priority)
+            .where(Task.id > after_id)
+            .order_by(Task.id)
+            .limit(chunk_size)
+        ).all()
+
+
+def count_remaining(after_id: int) -> int:
+    with ReadSessionLocal() as db:
+        return db.scalar(select(func.count()).where(Task.id > after_id))
+
+
+def retire_previous(client, keep_old: bool):
+    """Drop (or keep under a timestamped name) the collection parked by a swap"""
+    if keep_old:
+        old_name = f"{COLLECTION_NAME}_old_{int(time.time())}"
+        client.get_collection(SWAP_NAME).modify(name=old_name)
+        print(f"Previous collection kept as {old_name}")
+    else:
+        client.delete_collection(SWAP_NAME)
+
+
+def recover_swap(client, keep_old: bool):
+    """Finish or undo a swap interrupted between its renames"""
+    previous = find_collection(client, SWAP_NAME)
+    if previous is None:
+        return
+    if find_collection(client, COLLECTION_NAME) is None:
+        # Stopped before the build went live: put the previous index back
+        previous.modify(name=COLLECTION_NAME)
+        print(f"Restored {COLLECTION_NAME!r} from an interrupted swap")
+    else:
+        # The build went live, only retiring the previous collection was missed
+        retire_previous(client, keep_old)
+
+
+def swap(client, build, keep_old: bool):
+    """Rename the finished build collection to the live name"""
+    live = find_collection(client, COLLECTION_NAME)
+    if live is not None:
+        live.modify(name=SWAP_NAME)
+    build.modify(name=COLLECTION_NAME)
+    if live is not None:
+        retire_previous(client, keep_old)
+
+
+def reindex(
+    chunk_size: int,
+    batch_size: int,
+    workers: int,
+    devices: list,
+    restart: bool,
+    keep_old: bool,
+):
+    client = get_chroma_client()
+    recover_swap(client, keep_old)
+    build, last_task_id, indexed = open_build_collection(client, restart)
+    if indexed:
+        print(f"Resuming after task {last_task_id}, {indexed} tasks already indexed")
+    total = indexed + count_remaining(last_task_id)
+
+    model = get_model()
+    pool = None
+    if devices or workers > 1:
+        pool = model.start_multi_process_pool(devices or ["cpu"] * workers)
+
+    started = time.perf_counter()
+    written = 0
+    try:
+        while True:
+            rows = fetch_chunk(last_task_id, chunk_size)
+            if not rows:
+                break
+            texts = [task_index_text(row.title, row.description) for row in rows]
+            embeddings = model.encode(texts, batch_size=batch_size, pool=pool)
+            build.upsert(
+                ids=[str(row.id) for row in rows],
+                embeddings=embeddings,
+                metadatas=[
+                    task_index_metadata(row, text) for row, text in zip(rows, texts)
+                ],
+            )
+            last_task_id = rows[-1].id
+            indexed += len(rows)
+            written += len(rows)
+            # Recorded after the write, so a crash at worst redoes this chunk
+            build.modify(metadata=progress_metadata(last_task_id, indexed))
+
+            elapsed = time.perf_counter() - started
+            rate = written / elapsed if elapsed else 0.0
+            total = max(total, indexed)
+            eta = (total - indexed) / rate if rate else 0.0
+            print(
+                f"{indexed}/{total} tasks ({indexed / total:.1%}), "
+                f"{rate:.1f} docs/s, eta {eta:.0f}s",
+                flush=True,
+            )
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+
+    swap(client, build, keep_old)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Reindexed {indexed} tasks into {COLLECTION_NAME!r}; {written} encoded in "
+        f"{elapsed:.1f}s ({written / elapsed if elapsed else 0.0:.1f} docs/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=settings.index_batch_size)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--devices", default="", help="Comma-separated devices, e.g. cuda:0,cuda:1"
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="Discard an unfinished build"
+    )
+    parser.add_argument(
+        "--keep-old", action="store_true", help="Keep the replaced collection"
+    )
+    args = parser.parse_args()
+    devices = [device.strip() for device in args.devices.split(",") if device.strip()]
+    reindex(
+        args.chunk_size,
+        args.batch_size,
+        args.workers,
+        devices,
+        args.restart,
+        args.keep_old,
+    )
+
+
+if __name__ == "__main__":
+    main()
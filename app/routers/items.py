@@ -1,45 +1,47 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.schemas import ItemCreate, ItemOut
-from app.auth import get_db, get_current_user
+from app.auth import get_current_user, get_read_session, get_session
 from app.crud import create_item, get_items, update_item, delete_item
-from sqlalchemy.orm import Session
+from app.database import run_db
 from typing import List
 
 router = APIRouter()
 
 
 @router.post("/", response_model=ItemOut)
-def create(
+async def create(
     item: ItemCreate,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     current_user=Depends(get_current_user),
 ):
-    return create_item(db, item.title, item.description)
+    return await run_db(db, create_item, item.title, item.description)
 
 
 @router.get("/", response_model=List[ItemOut])
-def read(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    return get_items(db)
+async def read(
+    db=Depends(get_read_session), current_user=Depends(get_current_user)
+):
+    return await run_db(db, get_items)
 
 
 @router.put("/{item_id}", response_model=ItemOut)
-def update(
+async def update(
     item_id: int,
     item: ItemCreate,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     current_user=Depends(get_current_user),
 ):
-    db_item = update_item(db, item_id, item.title, item.description)
+    db_item = await run_db(db, update_item, item_id, item.title, item.description)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
     return db_item
 
 
 @router.delete("/{item_id}")
-def delete(
-    item_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)
+async def delete(
+    item_id: int, db=Depends(get_session), current_user=Depends(get_current_user)
 ):
-    db_item = delete_item(db, item_id)
+    db_item = await run_db(db, delete_item, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
     return {"msg": "Item deleted"}
@@ -1,11 +1,17 @@
+import asyncio
+import time
+import anyio
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
-import ollama
 import json
 from app.config import settings
 from app.auth import get_current_user
+from app.llm_cache import completion_cache
+from app.llm_scheduler import llm_scheduler
+from app.model_manager import model_manager
+from app.ollama_client import get_ollama_client
 
 router = APIRouter()
 
@@ -38,6 +44,7 @@ class LLMResponse(BaseModel):
     load_duration: Optional[int] = None
     prompt_eval_count: Optional[int] = None
     eval_count: Optional[int] = None
+    cached: bool = False  # Served from the completion cache
 
 
 class ModelInfo(BaseModel):
@@ -51,17 +58,7 @@ class ModelInfo(BaseModel):
 async def list_models(current_user: dict = Depends(get_current_user)):
     """List available Ollama models"""
     try:
-        response = ollama.list()
-
-        # Handle the ListResponse object - access models attribute directly
-        if hasattr(response, "models"):
-            models_data = response.models
-        elif isinstance(response, list):
-            models_data = response
-        elif isinstance(response, dict) and "models" in response:
-            models_data = response["models"]
-        else:
-            models_data = []
+        models_data = await model_manager.list_models()
 
         models_list = []
         for model in models_data:
@@ -90,11 +87,112 @@ async def list_models(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Failed to list models: {str(e)}")
 
 
+@router.get("/models/status")
+async def models_status(current_user: dict = Depends(get_current_user)):
+    """Models loaded in Ollama, their keep-alive and measured load times"""
+    try:
+        return await model_manager.status()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to get model status: {str(e)}"
+        )
+
+
+def generation_options(temperature: Optional[float], max_tokens: Optional[int]):
+    if max_tokens:
+        return {"temperature": temperature, "num_predict": max_tokens}
+    return {"temperature": temperature}
+
+
+def sse_event(data) -> str:
+    return f"data: {data if isinstance(data, str) else json.dumps(data)}\n\n"
+
+
+def chat_chunk_data(chunk, model: str) -> dict:
+    # Extract the serializable data from the ChatResponse object
+    chunk_data = {
+        "message": {
+            "role": chunk.get("message", {}).get("role", "assistant"),
+            "content": chunk.get("message", {}).get("content", ""),
+        },
+        "model": chunk.get("model", model),
+        "done": chunk.get("done", False),
+    }
+
+    # Add timing info if available
+    for field in ("total_duration", "load_duration", "prompt_eval_count", "eval_count"):
+        if chunk.get(field) is not None:
+            chunk_data[field] = chunk[field]
+    return chunk_data
+
+
+async def sse_chat_stream(stream, model: str, started: float, user: str):
+    """Relay an Ollama chat stream as server-sent events.
+
+    An LLM scheduler slot is taken for ``user`` before generation starts and
+    held until the stream ends. The next upstream chunk is only requested
+    once the previous event has been sent, so a slow client slows generation
+    instead of buffering it. While the model is silent a heartbeat comment is
+    sent every ``llm_heartbeat_interval`` seconds. If the client goes away the
+    response task is cancelled and closing ``stream`` drops the Ollama
+    connection, which aborts the generation.
+    """
+    try:
+        await llm_scheduler.acquire(user)
+    except HTTPException as e:
+        # Admission was checked before the response started, so this is rare
+        yield sse_event({"error": e.detail})
+        yield sse_event("[DONE]")
+        return
+    generation_started = time.monotonic()
+    upstream = stream.__aiter__()
+    pending = None
+    first_token_ms = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(upstream.__anext__())
+            done, _ = await asyncio.wait(
+                {pending}, timeout=settings.llm_heartbeat_interval
+            )
+            if not done:
+                yield ": heartbeat\n\n"
+                continue
+            current, pending = pending, None
+            try:
+                chunk = current.result()
+            except StopAsyncIteration:
+                break
+
+            chunk_data = chat_chunk_data(chunk, model)
+            if first_token_ms is None and chunk_data["message"]["content"]:
+                first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+                chunk_data["time_to_first_token_ms"] = first_token_ms
+            if chunk_data["done"]:
+                chunk_data["time_to_first_token_ms"] = first_token_ms
+                model_manager.record_load(model, chunk_data.get("load_duration"))
+            yield sse_event(chunk_data)
+        yield sse_event("[DONE]")
+    except Exception as e:
+        yield sse_event({"error": str(e)})
+        yield sse_event("[DONE]")
+    finally:
+        # Shielded: this also runs when the response task is being cancelled
+        with anyio.CancelScope(shield=True):
+            try:
+                if pending is not None:
+                    pending.cancel()
+                    await asyncio.gather(pending, return_exceptions=True)
+                await upstream.aclose()
+            finally:
+                llm_scheduler.release(time.monotonic() - generation_started)
+
+
 @router.post("/chat", response_model=LLMResponse)
 async def chat_completion(
     request: ChatRequest, current_user: dict = Depends(get_current_user)
 ):
-    """Chat completion endpoint using Ollama"""
+    """Chat completion endpoint using Ollama; ``stream`` returns server-sent events"""
     try:
         model = request.model or settings.ollama_model
 
@@ -102,78 +200,50 @@ async def chat_completion(
         messages = [
             {"role": msg.role, "content": msg.content} for msg in request.messages
         ]
+        options = generation_options(request.temperature, request.max_tokens)
 
         if request.stream:
-
-            def stream_chat():
-                try:
-                    for chunk in ollama.chat(
-                        model=model,
-                        messages=messages,
-                        stream=True,
-                        options=(
-                            {
-                                "temperature": request.temperature,
-                                "num_predict": request.max_tokens,
-                            }
-                            if request.max_tokens
-                            else {"temperature": request.temperature}
-                        ),
-                    ):
-                        # Extract the serializable data from the ChatResponse object
-                        chunk_data = {
-                            "message": {
-                                "role": chunk.get("message", {}).get(
-                                    "role", "assistant"
-                                ),
-                                "content": chunk.get("message", {}).get("content", ""),
-                            },
-                            "model": chunk.get("model", model),
-                            "done": chunk.get("done", False),
-                        }
-
-                        # Add timing info if available
-                        if "total_duration" in chunk:
-                            chunk_data["total_duration"] = chunk["total_duration"]
-                        if "load_duration" in chunk:
-                            chunk_data["load_duration"] = chunk["load_duration"]
-                        if "prompt_eval_count" in chunk:
-                            chunk_data["prompt_eval_count"] = chunk["prompt_eval_count"]
-                        if "eval_count" in chunk:
-                            chunk_data["eval_count"] = chunk["eval_count"]
-
-                        yield f"data: {json.dumps(chunk_data)}\n\n"
-
-                except Exception as e:
-                    yield f"data: {json.dumps({'error': str(e)})}\n\n"
-                finally:
-                    yield "data: [DONE]\n\n"
-
+            # Reject now, while a 429/503 can still be sent as the status code
+            llm_scheduler.check(current_user.username)
+            stream = await get_ollama_client().chat(
+                model=model,
+                messages=messages,
+                stream=True,
+                options=options,
+                keep_alive=model_manager.keep_alive(model),
+            )
             return StreamingResponse(
-                stream_chat(),
-                media_type="text/plain",
+                sse_chat_stream(
+                    stream,
+                    model,
+                    started=time.perf_counter(),
+                    user=current_user.username,
+                ),
+                media_type="text/event-stream",
                 headers={
                     "Cache-Control": "no-cache",
-                    "Connection": "keep-alive",
-                    "Content-Type": "text/plain; charset=utf-8",
+                    # Stop reverse proxies from buffering the event stream
+                    "X-Accel-Buffering": "no",
                 },
             )
 
-        response = ollama.chat(
-            model=model,
-            messages=messages,
-            stream=False,
-            options=(
-                {
-                    "temperature": request.temperature,
-                    "num_predict": request.max_tokens,
-                }
-                if request.max_tokens
-                else {"temperature": request.temperature}
-            ),
-        )
+        key = await completion_cache.key_for("chat", model, messages, options)
+        if key is not None:
+            cached = await completion_cache.get("chat", key)
+            if cached is not None:
+                return LLMResponse(**cached, cached=True)
+
+        async with llm_scheduler.slot(current_user.username):
+            response = await get_ollama_client().chat(
+                model=model,
+                messages=messages,
+                stream=False,
+                options=options,
+                keep_alive=model_manager.keep_alive(model),
+            )
+        model_manager.record_load(model, response.get("load_duration"))
 
-        return LLMResponse(
+        result = LLMResponse(
             content=response["message"]["content"],
             model=response["model"],
             total_duration=response.get("total_duration"),
@@ -181,7 +251,12 @@ async def chat_completion(
             prompt_eval_count=response.get("prompt_eval_count"),
             eval_count=response.get("eval_count"),
         )
+        if key is not None:
+            await completion_cache.set(key, result.model_dump(exclude={"cached"}))
+        return result
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat completion failed: {str(e)}")
 
@@ -193,21 +268,26 @@ async def text_completion(
     """Text completion endpoint using Ollama"""
     try:
         model = request.model or settings.ollama_model
+        options = generation_options(request.temperature, request.max_tokens)
 
-        response = ollama.generate(
-            model=model,
-            prompt=request.prompt,
-            options=(
-                {
-                    "temperature": request.temperature,
-                    "num_predict": request.max_tokens,
-                }
-                if request.max_tokens
-                else {"temperature": request.temperature}
-            ),
+        key = await completion_cache.key_for(
+            "completion", model, request.prompt, options
         )
+        if key is not None:
+            cached = await completion_cache.get("completion", key)
+            if cached is not None:
+                return LLMResponse(**cached, cached=True)
+
+        async with llm_scheduler.slot(current_user.username):
+            response = await get_ollama_client().generate(
+                model=model,
+                prompt=request.prompt,
+                options=options,
+                keep_alive=model_manager.keep_alive(model),
+            )
+        model_manager.record_load(model, response.get("load_duration"))
 
-        return LLMResponse(
+        result = LLMResponse(
             content=response["response"],
             model=response["model"],
             total_duration=response.get("total_duration"),
@@ -215,7 +295,12 @@ async def text_completion(
             prompt_eval_count=response.get("prompt_eval_count"),
             eval_count=response.get("eval_count"),
         )
+        if key is not None:
+            await completion_cache.set(key, result.model_dump(exclude={"cached"}))
+        return result
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Text completion failed: {str(e)}")
 
@@ -224,7 +309,10 @@ async def text_completion(
 async def pull_model(model_name: str, current_user: dict = Depends(get_current_user)):
     """Pull a model from Ollama registry"""
     try:
-        ollama.pull(model_name)
+        # Streamed so progress updates keep the connection within the read timeout
+        async for _ in await get_ollama_client().pull(model_name, stream=True):
+            pass
+        model_manager.invalidate()
         return {"message": f"Model {model_name} pulled successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to pull model: {str(e)}")
@@ -234,7 +322,8 @@ async def pull_model(model_name: str, current_user: dict = Depends(get_current_u
 async def delete_model(model_name: str, current_user: dict = Depends(get_current_user)):
     """Delete a model from Ollama"""
     try:
-        ollama.delete(model_name)
+        await get_ollama_client().delete(model_name)
+        model_manager.invalidate()
         return {"message": f"Model {model_name} deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete model: {str(e)}")
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends
+from app.auth import get_current_user, principal_cache
+from app.cache import backend
+from app.embeddings import query_cache, query_embedder
+from app.indexing import indexer
+from app.llm_cache import completion_cache
+from app.llm_scheduler import llm_scheduler
+from app.passwords import password_hasher
+from app.startup import report
+
+router = APIRouter()
+
+
+@router.get("/startup")
+def startup_stats(current_user=Depends(get_current_user)):
+    """Import and initialization time per subsystem"""
+    return report()
+
+
+@router.get("/indexing")
+def indexing_stats(current_user=Depends(get_current_user)):
+    """Background task-indexing queue depth, lag and throughput"""
+    return indexer.stats()
+
+
+@router.get("/search")
+def search_stats(current_user=Depends(get_current_user)):
+    """Search query embedding batch sizes and cache hit rate"""
+    return {"batching": query_embedder.stats(), "cache": query_cache.stats()}
+
+
+@router.get("/cache")
+def cache_stats(current_user=Depends(get_current_user)):
+    """Task list result cache size and hit rate"""
+    return backend.stats()
+
+
+@router.get("/auth")
+def auth_stats(current_user=Depends(get_current_user)):
+    """Principal cache hit rate and password hashing executor load"""
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+    }
+
+
+@router.get("/llm")
+def llm_stats(current_user=Depends(get_current_user)):
+    """LLM completion cache hit rate and scheduler queue depth and wait times"""
+    return {
+        "completion_cache": completion_cache.stats(),
+        "scheduler": llm_scheduler.stats(),
+    }
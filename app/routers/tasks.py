@@ -1,33 +1,59 @@
+import csv
 import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
-from app.schemas import TaskCreate, TaskOut, TaskStatus
-from app.auth import get_db, get_current_user
+import io
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from app.config import settings
+from app.schemas import (
+    TaskBulkResult,
+    TaskBulkUpdate,
+    TaskBulkUpdateResult,
+    TaskCreate,
+    TaskOut,
+    TaskStatusCount,
+)
+from app.auth import get_current_user, get_read_db, get_read_session, get_session
+from app.cache import cached_response
+from app.database import ReadSessionLocal, run_db
 from app.crud import (
+    count_tasks_by_status,
     create_task,
+    create_tasks_bulk,
     get_tasks,
     get_task,
     get_tasks_by_date,
     get_tasks_by_user,
     get_tasks_by_status,
+    next_cursor,
     update_task,
+    update_tasks_bulk,
     delete_task,
+    export_tasks,
     search_tasks,
 )
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 router = APIRouter()
 
+task_list_adapter = TypeAdapter(List[TaskOut])
+
+EXPORT_FIELDS = list(TaskOut.model_fields)
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
 
 @router.post("/", response_model=TaskOut)
-def create_new_task(
+async def create_new_task(
     task: TaskCreate,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     current_user=Depends(get_current_user),
 ):
     """Create a new task"""
-    return create_task(
-        db=db,
+    return await run_db(
+        db,
+        create_task,
         title=task.title,
         description=task.description,
         status=task.status,
@@ -41,114 +67,267 @@ def create_new_task(
     )
 
 
-def check_task_overdue(task_row: TaskOut) -> TaskOut:
-    # Convert the SQLAlchemy Row to a TaskOut model
-    task_dict = {
-        "id": task_row.id,
-        "title": task_row.title,
-        "description": task_row.description,
-        "status": task_row.status,
-        "user_id": task_row.user_id,
-        "start_date": task_row.start_date,
-        "end_date": task_row.end_date,
-        "jira_link": task_row.jira_link,
-        "created_by": task_row.created_by,
-        "pull_requests_links": task_row.pull_requests_links,
-        "priority": task_row.priority,
-        "username": task_row.username,
-    }
-
-    # Check if task is overdue and update status if needed
-    if (
-        task_row.end_date.date() < datetime.date.today()
-        and task_row.status != TaskStatus.COMPLETED.value
-    ):
-        task_dict["status"] = TaskStatus.OVERDUE
-
-    return TaskOut(**task_dict)
+@router.post("/bulk", response_model=List[TaskBulkResult])
+async def create_tasks_in_bulk(
+    tasks: List[TaskCreate],
+    db=Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    """Create many tasks at once, with a result or error per item"""
+    if len(tasks) > settings.bulk_max_tasks:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.bulk_max_tasks} tasks per bulk request",
+        )
+    return await run_db(db, create_tasks_bulk, tasks)
+
+
+@router.patch("/bulk", response_model=TaskBulkUpdateResult)
+async def update_tasks_in_bulk(
+    changes: TaskBulkUpdate,
+    db=Depends(get_session),
+    current_user=Depends(get_current_user),
+):
+    """Change status, assignee or priority of many tasks at once"""
+    updated = await run_db(
+        db,
+        update_tasks_bulk,
+        ids=changes.ids,
+        filter=changes.filter,
+        status=changes.status,
+        user_id=changes.user_id,
+        priority=changes.priority,
+    )
+    return {"updated": updated}
+
+
+async def task_list_response(
+    request: Request,
+    db,
+    fetch: Callable[[Session], list],
+    limit: int,
+) -> Response:
+    """Serialized task page from the result cache, with its X-Next-Cursor header"""
+
+    async def build():
+        rows = await run_db(db, fetch)
+        headers = {}
+        cursor = next_cursor(rows, limit)
+        if cursor:
+            headers["X-Next-Cursor"] = cursor
+        tasks = task_list_adapter.validate_python(rows, from_attributes=True)
+        return task_list_adapter.dump_json(tasks), headers
+
+    return await cached_response(request, build)
 
 
 @router.get("/", response_model=List[TaskOut])
-def read_tasks(
+async def read_tasks(
+    request: Request,
     skip: int = Query(0, ge=0, description="Number of tasks to skip"),
     limit: int = Query(
         100, ge=1, le=1000, description="Maximum number of tasks to return"
     ),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
+    db=Depends(get_read_session),
     current_user=Depends(get_current_user),
 ):
     """Get all tasks with pagination"""
-    return map(check_task_overdue, get_tasks(db, skip=skip, limit=limit))
+    return await task_list_response(
+        request,
+        db,
+        lambda session: get_tasks(session, skip=skip, limit=limit, cursor=cursor),
+        limit,
+    )
+
+
+def export_value(value):
+    return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+
+def rows_to_ndjson(rows) -> str:
+    return "".join(
+        json.dumps({field: export_value(row[field]) for field in EXPORT_FIELDS}) + "\n"
+        for row in rows
+    )
+
+
+def rows_to_csv(rows, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(
+        [export_value(row[field]) for field in EXPORT_FIELDS] for row in rows
+    )
+    return buffer.getvalue()
+
+
+@router.get("/export")
+def export_all_tasks(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = Query(None, description="Only tasks with this status"),
+    user_id: Optional[int] = Query(
+        None, description="Only tasks assigned to this user"
+    ),
+    start_date: Optional[datetime.datetime] = Query(
+        None, description="Only tasks starting on or after this date"
+    ),
+    end_date: Optional[datetime.datetime] = Query(
+        None, description="Only tasks ending on or before this date"
+    ),
+    current_user=Depends(get_current_user),
+):
+    """Stream every matching task as NDJSON or CSV"""
+
+    def generate():
+        # The stream outlives the request dependencies, so it owns its session
+        db = ReadSessionLocal()
+        try:
+            if format == "csv":
+                yield rows_to_csv([], header=True)
+            for rows in export_tasks(
+                db,
+                status=status,
+                user_id=user_id,
+                start_date=start_date,
+                end_date=end_date,
+            ):
+                rows = [row._mapping for row in rows]
+                yield rows_to_csv(rows) if format == "csv" else rows_to_ndjson(rows)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
 
 
 @router.get("/{task_id}", response_model=TaskOut)
-def read_task(
+async def read_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db=Depends(get_read_session),
     current_user=Depends(get_current_user),
 ):
     """Get a specific task by ID"""
-    db_task = get_task(db, task_id=task_id)
+    db_task = await run_db(db, get_task, task_id=task_id)
     if not db_task:
         raise HTTPException(status_code=404, detail="Task not found")
     return db_task
 
 
 @router.get("/date/{start_date}/{end_date}", response_model=List[TaskOut])
-def read_tasks_by_date(
+async def read_tasks_by_date(
     start_date: datetime.datetime,
     end_date: datetime.datetime,
+    request: Request,
     skip: int = Query(0, ge=0, description="Number of tasks to skip"),
     limit: int = Query(
         100, ge=1, le=1000, description="Maximum number of tasks to return"
     ),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
+    db=Depends(get_read_session),
     current_user=Depends(get_current_user),
 ):
     """Get all tasks within a specific date range"""
-    return get_tasks_by_date(
-        db, start_date=start_date, end_date=end_date, skip=skip, limit=limit
+    return await task_list_response(
+        request,
+        db,
+        lambda session: get_tasks_by_date(
+            session,
+            start_date=start_date,
+            end_date=end_date,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        ),
+        limit,
     )
 
 
 @router.get("/user/{user_id}", response_model=List[TaskOut])
-def read_tasks_by_user(
+async def read_tasks_by_user(
     user_id: int,
+    request: Request,
     skip: int = Query(0, ge=0, description="Number of tasks to skip"),
     limit: int = Query(
         100, ge=1, le=1000, description="Maximum number of tasks to return"
     ),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
+    db=Depends(get_read_session),
     current_user=Depends(get_current_user),
 ):
     """Get all tasks assigned to a specific user"""
-    return get_tasks_by_user(db, user_id=user_id, skip=skip, limit=limit)
+    return await task_list_response(
+        request,
+        db,
+        lambda session: get_tasks_by_user(
+            session, user_id=user_id, skip=skip, limit=limit, cursor=cursor
+        ),
+        limit,
+    )
 
 
 @router.get("/status/{status}", response_model=List[TaskOut])
-def read_tasks_by_status(
+async def read_tasks_by_status(
     status: str,
+    request: Request,
     skip: int = Query(0, ge=0, description="Number of tasks to skip"),
     limit: int = Query(
         100, ge=1, le=1000, description="Maximum number of tasks to return"
     ),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
+    db=Depends(get_read_session),
     current_user=Depends(get_current_user),
 ):
-    """Get all tasks with a specific status"""
-    return get_tasks_by_status(db, status=status, skip=skip, limit=limit)
+    """Get all tasks with a specific status, including the derived ``overdue``"""
+    return await task_list_response(
+        request,
+        db,
+        lambda session: get_tasks_by_status(
+            session, status=status, skip=skip, limit=limit, cursor=cursor
+        ),
+        limit,
+    )
+
+
+@router.get("/status/{status}/count", response_model=TaskStatusCount)
+async def count_tasks_with_status(
+    status: str,
+    request: Request,
+    db=Depends(get_read_session),
+    current_user=Depends(get_current_user),
+):
+    """Count tasks with a specific status, including the derived ``overdue``"""
+
+    async def build():
+        count = await run_db(db, count_tasks_by_status, status=status)
+        return TaskStatusCount(status=status, count=count).model_dump_json(), {}
+
+    return await cached_response(request, build)
 
 
 @router.put("/{task_id}", response_model=TaskOut)
-def update_existing_task(
+async def update_existing_task(
     task_id: int,
     task: TaskCreate,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     current_user=Depends(get_current_user),
 ):
     """Update an existing task"""
-    db_task = update_task(
-        db=db,
+    db_task = await run_db(
+        db,
+        update_task,
         task_id=task_id,
         title=task.title,
         description=task.description,
@@ -166,41 +345,41 @@ def update_existing_task(
 
 
 @router.patch("/{task_id}/status", response_model=TaskOut)
-def update_task_status(
+async def update_task_status(
     task_id: int,
     status: str,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     current_user=Depends(get_current_user),
 ):
     """Update only the status of a task"""
-    db_task = update_task(db=db, task_id=task_id, status=status)
+    db_task = await run_db(db, update_task, task_id=task_id, status=status)
     if not db_task:
         raise HTTPException(status_code=404, detail="Task not found")
     return db_task
 
 
 @router.patch("/{task_id}/assign", response_model=TaskOut)
-def assign_task_to_user(
+async def assign_task_to_user(
     task_id: int,
     user_id: int,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     current_user=Depends(get_current_user),
 ):
     """Assign a task to a different user"""
-    db_task = update_task(db=db, task_id=task_id, user_id=user_id)
+    db_task = await run_db(db, update_task, task_id=task_id, user_id=user_id)
     if not db_task:
         raise HTTPException(status_code=404, detail="Task not found")
     return db_task
 
 
 @router.delete("/{task_id}")
-def delete_existing_task(
+async def delete_existing_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db=Depends(get_session),
     current_user=Depends(get_current_user),
 ):
     """Delete a task"""
-    db_task = delete_task(db, task_id=task_id)
+    db_task = await run_db(db, delete_task, task_id=task_id)
     if not db_task:
         raise HTTPException(status_code=404, detail="Task not found")
     return {"msg": "Task deleted successfully"}
@@ -213,7 +392,8 @@ def search(
     limit: int = Query(
         100, ge=1, le=1000, description="Maximum number of tasks to return"
     ),
-    db: Session = Depends(get_db),
+    # Sync on purpose: encoding the query blocks, so it stays off the event loop
+    db: Session = Depends(get_read_db),
     current_user=Depends(get_current_user),
 ):
     """Search tasks by title or description"""
@@ -2,36 +2,37 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from app.schemas import UserCreate, UserOut, Token
 from app.models import User
 from app.auth import (
-    get_db,
-    get_password_hash,
+    get_session,
     get_user,
     authenticate_user,
     create_access_token,
     get_current_user,
+    principal_cache,
 )
-from sqlalchemy.orm import Session
+from app.crud import create_user
+from app.database import run_db
+from app.passwords import password_hasher
 from fastapi.security import OAuth2PasswordRequestForm
 
 router = APIRouter()
 
 
 @router.post("/register", response_model=UserOut)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    if get_user(db, user.username):
+async def register(user: UserCreate, db=Depends(get_session)):
+    if await run_db(db, get_user, user.username):
         raise HTTPException(status_code=400, detail="Username already registered")
-    hashed_password = get_password_hash(user.password)
-    db_user = User(username=user.username, hashed_password=hashed_password)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    # bcrypt runs on its own executor, not the shared request threadpool
+    hashed_password = await password_hasher.hash(user.password)
+    db_user = await run_db(db, create_user, user.username, hashed_password)
+    principal_cache.invalidate_user(db_user.username)
     return db_user
 
 
 @router.post("/login", response_model=Token)
-def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_session)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     token = create_access_token({"sub": user.username})
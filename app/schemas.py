@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -71,3 +72,35 @@ class TaskOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TaskStatusCount(BaseModel):
+    status: str
+    count: int
+
+
+class TaskBulkResult(BaseModel):
+    index: int
+    task: Optional[TaskOut] = None
+    error: Optional[str] = None
+
+
+class TaskBulkFilter(BaseModel):
+    status: Optional[str] = None
+    user_id: Optional[int] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+
+class TaskBulkUpdate(BaseModel):
+    # Select tasks by id, by filter, or both (both must match)
+    ids: Optional[List[int]] = None
+    filter: Optional[TaskBulkFilter] = None
+    # Fields to change on every selected task
+    status: Optional[str] = None
+    user_id: Optional[int] = None
+    priority: Optional[str] = None
+
+
+class TaskBulkUpdateResult(BaseModel):
+    updated: int
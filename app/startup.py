@@ -0,0 +1,23 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds spent importing / initializing each subsystem, in completion order
+timings: dict = {}
+_lock = threading.Lock()
+
+
+@contextmanager
+def timed(name: str):
+    """Record how long the wrapped block takes under ``name``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            timings[name] = round(time.perf_counter() - started, 4)
+
+
+def report() -> dict:
+    with _lock:
+        return {"timings": dict(timings), "total": round(sum(timings.values()), 4)}
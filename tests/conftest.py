@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the app at a throwaway database
+# (and cheap password hashing) before anything from app is imported
+_tmpdir = tempfile.mkdtemp(prefix="task-manager-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/test.db"
+os.environ["DB_ASYNC"] = "false"
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+def task_payload(i: int, **overrides) -> dict:
+    payload = {
+        "title": f"task {i}",
+        "description": f"test task {i}",
+        "status": "pending",
+        "user_id": 1,
+        "start_date": "2025-01-01T00:00:00",
+        "end_date": "2030-01-01T00:00:00",
+        "jira_link": "",
+        "created_by": 1,
+        "pull_requests_links": "",
+        "priority": "medium",
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.fixture(scope="session")
+def schema():
+    Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture(scope="session")
+def client(schema):
+    # No lifespan: the indexer and model preloading stay off, jobs just queue up
+    return TestClient(app)
+
+
+@pytest.fixture
+def db(schema):
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture(scope="session")
+def headers(client):
+    credentials = {"username": "tester", "password": "tester"}
+    client.post("/users/register", json=credentials)
+    login = client.post("/users/login", data=credentials)
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from app import cache
+from app import llm_cache as llm_cache_module
+from app.cache import InMemoryBackend, current_etag
+from app.llm_cache import CompletionCache
+
+
+def test_etag_rolls_over_after_ttl_without_writes(monkeypatch):
+    # Another worker's writes can't bump this backend, so ETags must expire
+    monkeypatch.setattr(cache, "backend", InMemoryBackend(maxsize=10, ttl=30))
+    now = [30 * 40_000.0]  # Start of a window
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+
+    etag = current_etag("tasks")
+    now[0] += 29
+    assert current_etag("tasks") == etag
+    now[0] += 1
+    assert current_etag("tasks") != etag
+
+
+def test_cached_entries_expire_after_ttl():
+    backend = InMemoryBackend(maxsize=10, ttl=30)
+    now = [500.0]
+    backend._entries.clock = lambda: now[0]
+    backend.set("key", {"body": b"[]"})
+    now[0] += 29
+    assert backend.get("key") == {"body": b"[]"}
+    now[0] += 1
+    assert backend.get("key") is None
+
+
+def test_promoted_disk_entries_keep_their_expiry(tmp_path, monkeypatch):
+    path = tmp_path / "llm_cache.db"
+    llm_cache = CompletionCache(enabled=True, ttl=60, disk_path=str(path))
+    assert not path.exists()  # Opened on first use, not at construction
+
+    asyncio.run(llm_cache.set("key", {"content": "done"}))
+    llm_cache._entries.clear()
+    # 50 of the 60 seconds have passed when the entry is promoted from disk
+    real_time = time.time
+    monkeypatch.setattr(llm_cache_module.time, "time", lambda: real_time() + 50)
+    assert asyncio.run(llm_cache.get("completion", "key")) == {"content": "done"}
+
+    expires_at, _ = llm_cache._entries._entries["key"]
+    assert expires_at - time.monotonic() <= 10
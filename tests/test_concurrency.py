@@ -0,0 +1,37 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app import database
+from app.config import settings
+from app.main import app
+
+REGISTRATIONS = 16
+
+
+@pytest.mark.parametrize("db_async", [False, True], ids=["sync", "async"])
+def test_concurrent_registrations_all_succeed(schema, monkeypatch, db_async):
+    # Each request reads (username check), then writes while others commit
+    monkeypatch.setattr(settings, "db_async", db_async)
+
+    async def register(http, i):
+        credentials = {"username": f"racer-{db_async}-{i}", "password": "pw"}
+        return await http.post("/users/register", json=credentials)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as http:
+                registrations = (register(http, i) for i in range(REGISTRATIONS))
+                return await asyncio.wait_for(asyncio.gather(*registrations), 60)
+        finally:
+            # Async engines are bound to this event loop
+            await database.dispose_async_engine()
+
+    responses = asyncio.run(scenario())
+    assert [r.status_code for r in responses] == [200] * REGISTRATIONS, [
+        r.text for r in responses if r.status_code != 200
+    ]
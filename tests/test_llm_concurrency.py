@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import httpx
+import ollama
+
+from app import ollama_client
+from app.main import app
+
+GENERATION_SECONDS = 1.0
+
+
+async def slow_ollama(request: httpx.Request) -> httpx.Response:
+    # Stands in for a long generation; yields to the event loop like real I/O
+    await asyncio.sleep(GENERATION_SECONDS)
+    return httpx.Response(
+        200,
+        json={
+            "model": "test-model",
+            "created_at": "2025-01-01T00:00:00Z",
+            "response": "done",
+            "done": True,
+        },
+    )
+
+
+def test_tasks_stay_responsive_during_a_long_generation(client, headers, monkeypatch):
+    fake = ollama.AsyncClient(
+        host="http://ollama.test", transport=httpx.MockTransport(slow_ollama)
+    )
+    monkeypatch.setattr(ollama_client, "_client", fake)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test", headers=headers
+        ) as http:
+            started = time.perf_counter()
+            generation = asyncio.create_task(
+                http.post(
+                    "/llm/completion", json={"prompt": "hi", "model": "test-model"}
+                )
+            )
+            await asyncio.sleep(0.1)  # Let the generation reach Ollama
+
+            latencies = []
+            for _ in range(5):
+                sent = time.perf_counter()
+                response = await http.get("/tasks/")
+                assert response.status_code == 200
+                latencies.append(time.perf_counter() - sent)
+            assert not generation.done()
+
+            response = await generation
+            elapsed = time.perf_counter() - started
+        await fake.close()
+        return latencies, response, elapsed
+
+    latencies, response, elapsed = asyncio.run(scenario())
+    assert response.status_code == 200, response.text
+    assert response.json()["content"] == "done"
+    assert elapsed >= GENERATION_SECONDS
+    # Each list request is served while the generation is still waiting
+    assert max(latencies) < GENERATION_SECONDS / 2, latencies
@@ -0,0 +1,60 @@
+from app.lru import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = LRUCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("a", 1)
+    clock.now += 59
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is None
+    assert (cache.expirations, len(cache)) == (1, 0)
+
+
+def test_explicit_expiry_only_shortens_ttl():
+    clock = FakeClock()
+    cache = LRUCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("soon", 1, expires_at=clock.now + 5)
+    cache.set("late", 2, expires_at=clock.now + 600)
+    clock.now += 30
+    assert cache.get("soon") is None
+    assert cache.get("late") == 2
+    clock.now += 30
+    assert cache.get("late") is None
+
+
+def test_zero_maxsize_disables_the_cache():
+    cache = LRUCache(maxsize=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_discard_where_drops_matching_values():
+    cache = LRUCache(maxsize=10)
+    cache.set("t1", {"sub": "alice"})
+    cache.set("t2", {"sub": "bob"})
+    cache.set("t3", {"sub": "alice"})
+    assert cache.discard_where(lambda value: value["sub"] == "alice") == 2
+    assert cache.get("t2") == {"sub": "bob"}
+    assert len(cache) == 1
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import event
+
+from app.crud import (
+    encode_cursor,
+    get_tasks,
+    get_tasks_by_status,
+    get_tasks_by_user,
+)
+from app.database import engine
+from app.models import Task
+
+CURSOR = encode_cursor(Task(priority_rank=1, id=5))
+
+
+def query_plan(run) -> list:
+    """EXPLAIN QUERY PLAN details of the last SELECT sent while calling ``run``"""
+    selects = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    statement, parameters = selects[-1]
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[3] for row in rows]
+
+
+PAGES = {
+    "list": lambda db: get_tasks(db),
+    "list-cursor": lambda db: get_tasks(db, cursor=CURSOR),
+    "user": lambda db: get_tasks_by_user(db, 1),
+    "user-cursor": lambda db: get_tasks_by_user(db, 1, cursor=CURSOR),
+    "status": lambda db: get_tasks_by_status(db, "completed"),
+    "open-status": lambda db: get_tasks_by_status(db, "pending"),
+    "status-cursor": lambda db: get_tasks_by_status(db, "completed", cursor=CURSOR),
+}
+
+
+@pytest.mark.parametrize("query", PAGES.values(), ids=PAGES.keys())
+def test_task_pages_use_an_index(db, query):
+    plan = query_plan(lambda: query(db))
+    # "SCAN tasks USING INDEX ..." walks an index in page order and is fine;
+    # a bare "SCAN tasks" reads the whole table
+    assert "SCAN tasks" not in plan, plan
+    assert not any("USE TEMP B-TREE" in step for step in plan), plan
+
+
+@pytest.mark.parametrize("page", ["user-cursor", "status-cursor"])
+def test_filtered_cursor_pages_seek(db, page):
+    # The filter and the cursor position are both index lookups
+    plan = query_plan(lambda: PAGES[page](db))
+    assert any(
+        step.startswith("SEARCH tasks") and "priority_rank>?" in step for step in plan
+    ), plan
@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import event
+
+from app.config import settings
+from app.database import engine
+
+from .conftest import task_payload
+
+
+@pytest.fixture
+def statements():
+    """SQL statements sent on the write engine, without transaction control"""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.strip().upper() != "BEGIN":
+            executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def create(client, headers, i, **overrides):
+    response = client.post(
+        "/tasks/", json=task_payload(i, **overrides), headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_create_is_one_statement(client, headers, statements):
+    create(client, headers, 1)
+    assert len(statements) == 1
+
+
+def test_update_is_one_statement(client, headers, statements):
+    task = create(client, headers, 2)
+    statements.clear()
+    response = client.put(
+        f"/tasks/{task['id']}", json=task_payload(2, title="renamed"), headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["title"] == "renamed"
+    assert len(statements) == 1
+
+
+def test_status_update_is_one_statement(client, headers, statements):
+    task = create(client, headers, 3)
+    statements.clear()
+    response = client.patch(
+        f"/tasks/{task['id']}/status", params={"status": "completed"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert len(statements) == 1
+
+
+def test_delete_is_one_statement(client, headers, statements):
+    task = create(client, headers, 4)
+    statements.clear()
+    response = client.delete(f"/tasks/{task['id']}", headers=headers)
+    assert response.status_code == 200
+    assert len(statements) == 1
+
+
+def test_unknown_user_is_two_statements(client, headers, statements):
+    # The failed write, then one lookup to say which user is missing
+    response = client.post(
+        "/tasks/", json=task_payload(5, created_by=424242), headers=headers
+    )
+    assert response.status_code == 400
+    assert "424242" in response.json()["detail"]
+    assert len(statements) == 2
+
+
+def test_bulk_create_is_one_write_transaction(client, headers, monkeypatch):
+    # Chunks are savepoints inside one BEGIN IMMEDIATE, not separate commits
+    monkeypatch.setattr(settings, "bulk_insert_chunk_size", 1)
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement.split()[0].upper())
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.post(
+            "/tasks/bulk",
+            json=[task_payload(i) for i in range(10, 13)],
+            headers=headers,
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    assert all(item["error"] is None for item in response.json())
+    # The user check reads outside any transaction, then the writes start
+    assert executed[:3] == ["SELECT", "BEGIN", "SAVEPOINT"]
+    assert executed.count("SAVEPOINT") == executed.count("RELEASE") == 3
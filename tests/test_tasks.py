@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app.database import check_schema, engine
+
+from .conftest import task_payload
+
+
+def test_get_task_reports_overdue(client, headers):
+    payload = task_payload(
+        1, start_date="2020-01-01T00:00:00", end_date="2020-02-01T00:00:00"
+    )
+    created = client.post("/tasks/", json=payload, headers=headers).json()
+
+    response = client.get(f"/tasks/{created['id']}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "overdue"
+
+    listed = client.get("/tasks/status/overdue", headers=headers).json()
+    assert created["id"] in [task["id"] for task in listed]
+
+
+def test_get_task_keeps_completed_status_past_end_date(client, headers):
+    payload = task_payload(
+        2,
+        status="completed",
+        start_date="2020-01-01T00:00:00",
+        end_date="2020-02-01T00:00:00",
+    )
+    created = client.post("/tasks/", json=payload, headers=headers).json()
+
+    response = client.get(f"/tasks/{created['id']}", headers=headers)
+    assert response.json()["status"] == "completed"
+
+
+def test_get_missing_task_is_404(client, headers):
+    assert client.get("/tasks/999999", headers=headers).status_code == 404
+
+
+def test_outdated_schema_fails_with_upgrade_hint(tmp_path):
+    # A tasks table from before priority_rank and the FTS index existed
+    old = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with old.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE tasks (id INTEGER PRIMARY KEY, title TEXT)")
+    with pytest.raises(RuntimeError) as error:
+        check_schema(old)
+    assert "tasks.priority_rank" in str(error.value)
+    assert "tasks_fts" in str(error.value)
+    assert "alembic upgrade head" in str(error.value)
+
+
+def test_current_schema_passes_check(schema):
+    check_schema(engine)